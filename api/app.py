@@ -257,7 +257,8 @@ async def generate_innovations(request: GenerateRequest):
                 extracted_dir = temp_path / "extracted"
                 extracted_dir.mkdir(exist_ok=True)
                 
-                parsed_papers = parser.batch_parse_papers(papers_dir, extracted_dir)
+                # 无服务器环境没有 /dev/shm，无法使用进程池，在当前进程内解析
+                parsed_papers = parser.batch_parse_papers(papers_dir, extracted_dir, max_workers=1)
                 results["parsed_count"] = len(parsed_papers)
                 
                 if not parsed_papers:
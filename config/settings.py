@@ -31,8 +31,11 @@ class Settings(BaseSettings):
     # DeepSeek API设置
     DEEPSEEK_API_KEY: Optional[str] = None
     DEEPSEEK_MODEL: str = "deepseek-chat"
+    DEEPSEEK_BASE_URL: str = "https://api.deepseek.com/v1"
     DEEPSEEK_MAX_TOKENS: int = 4000
     DEEPSEEK_TEMPERATURE: float = 0.7
+    DEEPSEEK_ESCALATION_MODEL: str = ""  # 提取置信度低时改用的更强模型（如 deepseek-reasoner），为空时不升级
+    ESCALATION_CONFIDENCE_THRESHOLD: float = 0.7  # 整体置信度低于该值时用更强的模型重新提取
     
     # 文件处理设置
     MAX_PDF_SIZE_MB: int = 50
@@ -42,6 +45,7 @@ class Settings(BaseSettings):
     CRAWL_DELAY: float = 1.0  # 请求间隔（秒）
     MAX_RETRIES: int = 3
     TIMEOUT: int = 30
+    DOWNLOAD_WORKERS: int = 4  # 并发下载PDF的线程数
     
     # 日志设置
     LOG_LEVEL: str = "INFO"
@@ -51,6 +55,15 @@ class Settings(BaseSettings):
     STREAMLIT_PORT: int = 8501
     STREAMLIT_HOST: str = "localhost"
     
+    # 性能优化设置
+    MAX_CONCURRENT_REQUESTS: int = 8  # 并发AI请求数上限
+    REQUEST_TIMEOUT: int = 300  # AI请求超时时间（秒）
+    HTTP_KEEPALIVE_EXPIRY: float = 60.0  # 空闲连接保持时间（秒），间隔较长的请求仍可复用已建立的TLS连接
+    EXTRACTION_BATCH_SIZE: int = 3  # 单次AI请求合并提取的论文数
+    PERSIST_INTERMEDIATE: bool = False  # 是否将论文解析结果等中间文件写入会话目录
+    LLM_CACHE: bool = False  # 是否将AI响应按提示词缓存到磁盘（环境变量 LLM_CACHE=1 开启）
+    LLM_CACHE_TTL: int = 0  # 磁盘缓存的AI响应有效期（秒），0 表示不过期
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
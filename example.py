@@ -4,8 +4,8 @@
 import os
 import sys
 from pathlib import Path
-import json
 import shutil
+import orjson
 from datetime import datetime
 
 # 添加项目根目录到Python路径
@@ -117,8 +117,7 @@ def example_workflow():
                     }
                     output_json = extracted_dir / f"{parsed_json['title'].replace(' ', '_')[:50]}_parsed.json"
                     try:
-                        with open(output_json, "w", encoding="utf-8") as f:
-                            json.dump(parsed_json, f, ensure_ascii=False, indent=2)
+                        output_json.write_bytes(orjson.dumps(parsed_json, option=orjson.OPT_INDENT_2))
                         logger.info(f"已保存解析结果: {output_json}")
                     except Exception as e:
                         logger.error(f"保存解析结果失败: {e}")
@@ -149,8 +148,7 @@ def example_workflow():
                 logger.info(f"找到 {len(json_files)} 个解析文件")
                 for json_file in json_files:
                     try:
-                        with open(json_file, "r", encoding="utf-8") as f:
-                            paper_data = json.load(f)
+                        paper_data = orjson.loads(json_file.read_bytes())
                         paper_title = paper_data.get("title", "")
                         paper_content = paper_data.get("full_text", "")
                         if not paper_title or not paper_content:
@@ -192,8 +190,7 @@ def example_workflow():
                 innovations_list = []
                 for json_file in json_files:
                     try:
-                        with open(json_file, "r", encoding="utf-8") as f:
-                            data = json.load(f)
+                        data = orjson.loads(json_file.read_bytes())
                         # 将字典转换为 ExtractedInnovations 对象
                         from src.extractor.innovation_extractor import ExtractedInnovations, InnovationPoint
                         
@@ -231,28 +228,10 @@ def example_workflow():
                     if result:
                         output_file = results_dir / f"generated_ideas_{topic.replace(' ', '_')}.json"
                         try:
-                            # 将结果转换为可序列化的格式
-                            result_data = {
-                                "topic": result.topic,
-                                "generated_ideas": [
-                                    {
-                                        "title": idea.title,
-                                        "description": idea.description,
-                                        "source_innovations": idea.source_innovations,
-                                        "combination_type": idea.combination_type,
-                                        "feasibility_score": idea.feasibility_score,
-                                        "novelty_score": idea.novelty_score,
-                                        "impact_potential": idea.impact_potential,
-                                        "implementation_path": idea.implementation_path,
-                                        "research_directions": idea.research_directions
-                                    }
-                                    for idea in result.generated_ideas
-                                ],
-                                "analysis_summary": result.analysis_summary,
-                                "generation_metadata": result.generation_metadata
-                            }
-                            with open(output_file, "w", encoding="utf-8") as f:
-                                json.dump(result_data, f, ensure_ascii=False, indent=2)
+                            # GeneratedIdea 等数据类由orjson直接序列化，字段与逐项构建的字典一致
+                            output_file.write_bytes(
+                                orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+                            )
                             logger.success(f"已生成新想法并保存: {output_file}")
                         except Exception as e:
                             logger.error(f"保存新想法失败: {e}")
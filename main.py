@@ -24,12 +24,7 @@ def cli():
     pass
 
 
-@cli.command()
-@click.option('--query', '-q', required=True, help='搜索查询')
-@click.option('--max-results', '-m', default=20, help='最大结果数量')
-@click.option('--category', '-c', help='论文类别')
-@click.option('--download', '-d', is_flag=True, help='下载论文PDF')
-def search(query, max_results, category, download):
+def cmd_search(query, max_results=20, category=None, download=False):
     """搜索ArXiv论文"""
     logger.info(f"开始搜索论文: {query}")
     
@@ -68,10 +63,7 @@ def search(query, max_results, category, download):
         logger.error(f"搜索失败: {e}")
 
 
-@cli.command()
-@click.option('--input-dir', '-i', default='data/papers', help='PDF文件目录')
-@click.option('--output-dir', '-o', default='data/extracted', help='输出目录')
-def parse(input_dir, output_dir):
+def cmd_parse(input_dir='data/papers', output_dir='data/extracted'):
     """解析PDF论文"""
     logger.info("开始解析PDF论文")
     
@@ -103,10 +95,7 @@ def parse(input_dir, output_dir):
         logger.error(f"解析失败: {e}")
 
 
-@cli.command()
-@click.option('--input-dir', '-i', default='data/extracted', help='解析文件目录')
-@click.option('--output-dir', '-o', default='data/innovations', help='输出目录')
-def extract(input_dir, output_dir):
+def cmd_extract(input_dir='data/extracted', output_dir='data/innovations'):
     """提取创新点"""
     logger.info("开始提取创新点")
     
@@ -148,11 +137,7 @@ def extract(input_dir, output_dir):
         logger.error(f"提取失败: {e}")
 
 
-@cli.command()
-@click.option('--input-dir', '-i', default='data/innovations', help='创新点文件目录')
-@click.option('--output-dir', '-o', default='data/results', help='输出目录')
-@click.option('--topic', '-t', required=True, help='研究主题')
-def generate(input_dir, output_dir, topic):
+def cmd_generate(topic, input_dir='data/innovations', output_dir='data/results'):
     """生成新想法"""
     logger.info(f"开始生成想法，主题: {topic}")
     
@@ -187,6 +172,44 @@ def generate(input_dir, output_dir, topic):
         logger.error(f"生成失败: {e}")
 
 
+# 以上cmd_*函数可供start.py在同一进程内直接调用，下面的命令只做参数解析
+
+
+@cli.command()
+@click.option('--query', '-q', required=True, help='搜索查询')
+@click.option('--max-results', '-m', default=20, help='最大结果数量')
+@click.option('--category', '-c', help='论文类别')
+@click.option('--download', '-d', is_flag=True, help='下载论文PDF')
+def search(query, max_results, category, download):
+    """搜索ArXiv论文"""
+    cmd_search(query, max_results, category, download)
+
+
+@cli.command()
+@click.option('--input-dir', '-i', default='data/papers', help='PDF文件目录')
+@click.option('--output-dir', '-o', default='data/extracted', help='输出目录')
+def parse(input_dir, output_dir):
+    """解析PDF论文"""
+    cmd_parse(input_dir, output_dir)
+
+
+@cli.command()
+@click.option('--input-dir', '-i', default='data/extracted', help='解析文件目录')
+@click.option('--output-dir', '-o', default='data/innovations', help='输出目录')
+def extract(input_dir, output_dir):
+    """提取创新点"""
+    cmd_extract(input_dir, output_dir)
+
+
+@cli.command()
+@click.option('--input-dir', '-i', default='data/innovations', help='创新点文件目录')
+@click.option('--output-dir', '-o', default='data/results', help='输出目录')
+@click.option('--topic', '-t', required=True, help='研究主题')
+def generate(input_dir, output_dir, topic):
+    """生成新想法"""
+    cmd_generate(topic, input_dir, output_dir)
+
+
 @cli.command()
 @click.option('--port', '-p', default=8501, help='端口号')
 @click.option('--host', '-h', default='localhost', help='主机地址')
@@ -1,9 +1,15 @@
 """
 ArXiv论文爬取模块
 """
+import os
+import re
 import time
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 from pathlib import Path
+from requests.adapters import HTTPAdapter
 from typing import List, Dict, Optional
 from dataclasses import dataclass
 from datetime import datetime
@@ -11,6 +17,9 @@ import arxiv
 from loguru import logger
 from config.settings import settings
 
+# 文件名中只保留字母、数字、下划线、空格和连字符（\w 与 str.isalnum() 加下划线一致）
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^\w \-]')
+
 
 @dataclass
 class PaperMetadata:
@@ -37,6 +46,33 @@ class ArXivCrawler:
         )
         self.papers_dir = settings.DATA_DIR / "papers"
         self.papers_dir.mkdir(parents=True, exist_ok=True)
+        
+        # 下载PDF共用的会话，连接池大小与下载并发数一致以保持长连接
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=settings.DOWNLOAD_WORKERS,
+            pool_maxsize=settings.DOWNLOAD_WORKERS
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        # 所有下载线程共用的请求节奏：相邻两次下载请求至少间隔 CRAWL_DELAY 秒
+        self._request_lock = threading.Lock()
+        self._next_request_at = 0.0
+    
+    def _wait_for_request_slot(self):
+        """
+        等待轮到下一次下载请求
+        
+        在锁内预约发起请求的时刻，锁外等待，多个线程按预约顺序依次发起请求，
+        整体请求频率与串行下载时相同
+        """
+        with self._request_lock:
+            now = time.monotonic()
+            request_at = max(now, self._next_request_at)
+            self._next_request_at = request_at + settings.CRAWL_DELAY
+        if request_at > now:
+            time.sleep(request_at - now)
     
     def search_papers(self, query: str, max_results: int = None) -> List[PaperMetadata]:
         """
@@ -86,60 +122,68 @@ class ArXivCrawler:
             logger.error(f"搜索论文时发生错误: {e}")
             raise
     
-    def download_paper(self, paper: PaperMetadata) -> Optional[Path]:
+    def download_paper(self, paper: PaperMetadata, papers_dir: Optional[Path] = None) -> Optional[Path]:
         """
         下载论文PDF
         
         Args:
             paper: 论文元数据
+            papers_dir: 保存目录，默认为 self.papers_dir
             
         Returns:
             下载的文件路径，如果失败返回None
         """
         try:
             # 构建文件名
-            safe_title = "".join(c for c in paper.title if c.isalnum() or c in (' ', '-', '_')).rstrip()
+            safe_title = _UNSAFE_FILENAME_CHARS.sub('', paper.title).rstrip()
             filename = f"{paper.arxiv_id}_{safe_title[:50]}.pdf"
-            filepath = self.papers_dir / filename
+            filepath = (papers_dir or self.papers_dir) / filename
             
             # 检查文件是否已存在
             if filepath.exists():
                 logger.info(f"论文已存在: {filename}")
                 return filepath
             
-            # 用 arxiv 包下载 PDF
+            # 直接按 pdf_url 下载，复用会话连接，无需再查询一次API
+            self._wait_for_request_slot()
             logger.info(f"开始下载论文: {paper.title}")
-            search = arxiv.Search(id_list=[paper.arxiv_id])
-            result = next(self.client.results(search))
-            result.download_pdf(dirpath=str(self.papers_dir), filename=filename)
+            response = self.session.get(paper.pdf_url, timeout=settings.TIMEOUT)
+            response.raise_for_status()
+            
+            # 先写临时文件再替换，中断或磁盘写满时不会留下被当作已下载的半截PDF
+            part_path = filepath.with_name(f"{filename}.{os.getpid()}.{threading.get_ident()}.part")
+            try:
+                part_path.write_bytes(response.content)
+                os.replace(part_path, filepath)
+            finally:
+                part_path.unlink(missing_ok=True)
             logger.info(f"论文下载完成: {filename}")
             return filepath
         except Exception as e:
             logger.error(f"下载论文失败 {paper.arxiv_id}: {e}")
             return None
     
-    def download_papers(self, papers: List[PaperMetadata]) -> List[Path]:
+    def download_papers(self, papers: List[PaperMetadata], papers_dir: Optional[Path] = None) -> List[Path]:
         """
         批量下载论文
         
         Args:
             papers: 论文元数据列表
+            papers_dir: 保存目录，默认为 self.papers_dir
             
         Returns:
             成功下载的文件路径列表
         """
         logger.info(f"开始批量下载 {len(papers)} 篇论文")
         
+        # 下载为网络I/O，多线程并发下载；各线程共用请求间隔，对arXiv的请求频率不随线程数增加
         downloaded_files = []
-        for i, paper in enumerate(papers, 1):
-            logger.info(f"下载进度: {i}/{len(papers)}")
-            
-            filepath = self.download_paper(paper)
-            if filepath:
-                downloaded_files.append(filepath)
-            
-            # 添加延迟避免请求过快
-            time.sleep(settings.CRAWL_DELAY)
+        max_workers = max(1, min(settings.DOWNLOAD_WORKERS, len(papers)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for i, filepath in enumerate(executor.map(self.download_paper, papers, repeat(papers_dir)), 1):
+                logger.info(f"下载进度: {i}/{len(papers)}")
+                if filepath:
+                    downloaded_files.append(filepath)
         
         logger.info(f"批量下载完成，成功下载 {len(downloaded_files)} 篇论文")
         return downloaded_files
@@ -1,28 +1,34 @@
 """
 创新点提取模块
 """
-import json
-from typing import List, Dict, Optional
-from dataclasses import dataclass
+import os
+import re
+import orjson
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Dict, Generator, Iterable, List, Optional, Tuple
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 from loguru import logger
+from pydantic import TypeAdapter, ValidationError
 from config.settings import settings
-from src.utils.ai_client import call_ai
+from src.utils.ai_client import call_ai, acall_deepseek, aclose_clients, stream_deepseek, content_key, ResultCache
 
 
-@dataclass
+@dataclass(slots=True)
 class InnovationPoint:
-    """创新点"""
-    title: str
-    description: str
-    category: str
-    impact: str
-    methodology: str
-    novelty_score: float
-    confidence: float
+    """创新点（默认值即AI结果中缺少对应字段时的取值）"""
+    title: str = ''
+    description: str = ''
+    category: str = ''
+    impact: str = ''
+    methodology: str = ''
+    novelty_score: float = 0.5
+    confidence: float = 0.5
 
 
-@dataclass
+@dataclass(slots=True)
 class ExtractedInnovations:
     """提取的创新点集合"""
     paper_title: str
@@ -32,6 +38,337 @@ class ExtractedInnovations:
     extraction_metadata: Dict
 
 
+@dataclass
+class _ExtractionPayload:
+    """单篇论文提取结果的JSON结构"""
+    innovations: List[InnovationPoint] = field(default_factory=list)
+    summary: str = ''
+    extraction_metadata: Dict = field(default_factory=dict)
+    paper_index: int = 0  # 仅批量提取结果中使用
+    paper_title: str = ''  # 仅保存的创新点文件中使用
+    paper_id: str = ''  # 仅保存的创新点文件中使用
+
+
+@dataclass
+class _ExtractionSummary:
+    """流式提取时创新点已逐项解析，整体只需再取出的其余字段"""
+    summary: str = ''
+    extraction_metadata: Dict = field(default_factory=dict)
+
+
+@dataclass
+class _BatchExtractionPayload:
+    """批量提取结果的JSON结构"""
+    papers: List[_ExtractionPayload] = field(default_factory=list)
+
+
+# AI返回的JSON由pydantic（Rust实现）一次解析并直接构建为上面的数据类，
+# 不再经过 json.loads 得到的中间字典
+_EXTRACTION_ADAPTER = TypeAdapter(_ExtractionPayload)
+_INNOVATION_ADAPTER = TypeAdapter(InnovationPoint)
+_BATCH_EXTRACTION_ADAPTER = TypeAdapter(_BatchExtractionPayload)
+_SUMMARY_ADAPTER = TypeAdapter(_ExtractionSummary)
+
+
+# DeepSeek 单次请求的输出token上限
+MAX_OUTPUT_TOKENS = 8192
+# 每篇论文发送给模型的输入token预算，开头（摘要、引言）占 2/3，结论占 1/3
+MAX_CONTENT_TOKENS = 2400
+# DeepSeek 文档给出的估算：1个英文字符约0.3个token，1个中文字符约0.6个token
+ASCII_CHAR_TOKENS = 0.3
+WIDE_CHAR_TOKENS = 0.6
+# 估算字符与token比例时只采样开头的这些字符
+TOKEN_SAMPLE_CHARS = 4000
+
+# 结论章节标题行，以及结论之后不需要发送的参考文献标题行
+_CONCLUSION_HEADING = re.compile(
+    r'^[ \t]*(?:\d+\.?[ \t]*)?(?:conclusions?|concluding remarks|结论)[^\n]{0,40}$',
+    re.IGNORECASE | re.MULTILINE
+)
+_REFERENCES_HEADING = re.compile(r'^[ \t]*(?:references|bibliography|参考文献)[ \t]*$', re.IGNORECASE | re.MULTILINE)
+
+# 提示词中固定不变的说明与JSON格式，放在提示开头；各篇论文的内容拼接在末尾，
+# 使多次请求共享相同前缀，命中API的前缀缓存
+EXTRACTION_PROMPT_PREFIX = """
+请分析文末给出的学术论文，提取其中的创新点，并以JSON格式返回：
+
+{
+    "innovations": [
+        {
+            "title": "创新点标题",
+            "description": "创新点详细描述",
+            "category": "创新类别（如：算法创新、架构创新、应用创新等）",
+            "impact": "创新影响和意义",
+            "methodology": "实现方法",
+            "novelty_score": 0.85,
+            "confidence": 0.9
+        }
+    ],
+    "summary": "论文创新点总结",
+    "extraction_metadata": {
+        "model_used": "使用的模型",
+        "extraction_time": "提取时间",
+        "confidence_overall": 0.85
+    }
+}
+
+要求：
+1. 创新点要具体、可量化
+2. 每个创新点都要有明确的类别和影响评估
+3. novelty_score和confidence都是0-1之间的数值
+4. 确保JSON格式正确
+"""
+
+BATCH_EXTRACTION_PROMPT_PREFIX = """
+请分别分析文末给出的多篇学术论文，提取每篇论文的创新点。
+
+请以JSON格式返回，papers 数组中每一项对应一篇论文，paper_index 为论文编号：
+
+{
+    "papers": [
+        {
+            "paper_index": 1,
+            "innovations": [
+                {
+                    "title": "创新点标题",
+                    "description": "创新点详细描述",
+                    "category": "创新类别（如：算法创新、架构创新、应用创新等）",
+                    "impact": "创新影响和意义",
+                    "methodology": "实现方法",
+                    "novelty_score": 0.85,
+                    "confidence": 0.9
+                }
+            ],
+            "summary": "论文创新点总结",
+            "extraction_metadata": {
+                "model_used": "使用的模型",
+                "extraction_time": "提取时间",
+                "confidence_overall": 0.85
+            }
+        }
+    ]
+}
+
+要求：
+1. 每篇论文都必须返回一项，且 paper_index 与论文编号一致
+2. 创新点要具体、可量化
+3. 每个创新点都要有明确的类别和影响评估
+4. novelty_score和confidence都是0-1之间的数值
+5. 确保JSON格式正确
+"""
+
+
+def _content_char_budget(content: str, max_tokens: int = MAX_CONTENT_TOKENS) -> int:
+    """
+    按论文开头的中英文字符比例，估算token预算对应的字符数
+    
+    同样的字符数，中文论文消耗的token约为英文的两倍，按字符裁剪会让英文论文用不满预算
+    
+    Args:
+        content: 论文全文
+        max_tokens: 输入token预算
+        
+    Returns:
+        最大字符数
+    """
+    sample = content[:TOKEN_SAMPLE_CHARS]
+    # 非ASCII字符（中文等）在UTF-8中占多个字节，按多出的字节数估算其个数，不必逐字符判断
+    wide = min(len(sample), (len(sample.encode('utf-8')) - len(sample)) // 2)
+    tokens = (len(sample) - wide) * ASCII_CHAR_TOKENS + wide * WIDE_CHAR_TOKENS
+    if not tokens:
+        return 0
+    return int(max_tokens * len(sample) / tokens)
+
+
+# 裁剪结果按 (内容哈希, 字符数) 缓存，只保存裁剪后的文本，不长期持有论文全文
+_TRUNCATE_CACHE = ResultCache(maxsize=32)
+
+
+def _truncate_content(content: str, max_chars: Optional[int] = None) -> str:
+    """
+    将论文内容裁剪到输入预算内
+    
+    保留开头的摘要和引言，以及结论章节（不含参考文献）；找不到结论时只保留开头。
+    结果按内容缓存：批量提示中缺失的论文改为单篇提取时，不必再次扫描全文查找结论
+    
+    Args:
+        content: 论文全文
+        max_chars: 最大字符数，默认按 MAX_CONTENT_TOKENS 估算
+        
+    Returns:
+        裁剪后的内容
+    """
+    if max_chars is None:
+        max_chars = _content_char_budget(content)
+    if len(content) <= max_chars:
+        return content
+    
+    key = content_key(content, str(max_chars))
+    truncated = _TRUNCATE_CACHE.get(key)
+    if truncated is None:
+        truncated = _truncate_long_content(content, max_chars)
+        _TRUNCATE_CACHE.put(key, truncated)
+    return truncated
+
+
+def _truncate_long_content(content: str, max_chars: int) -> str:
+    """
+    裁剪超出字符预算的论文内容，见 _truncate_content
+    
+    Args:
+        content: 论文全文
+        max_chars: 最大字符数
+        
+    Returns:
+        裁剪后的内容
+    """
+    head_chars = max_chars * 2 // 3
+    # 只在参考文献之前查找结论，参考文献中以 "conclusions" 开头的折行不会被当作结论标题
+    references = _REFERENCES_HEADING.search(content, head_chars)
+    end = references.start() if references else len(content)
+    conclusion = None
+    for conclusion in _CONCLUSION_HEADING.finditer(content, head_chars, end):
+        pass
+    if conclusion is None:
+        return content[:max_chars]
+    
+    tail = content[conclusion.start():min(end, conclusion.start() + max_chars - head_chars)]
+    return f"{content[:head_chars]}\n...\n{tail}"
+
+
+def _validate_json_object(adapter: TypeAdapter, text: str):
+    """
+    从AI结果文本中解析JSON对象
+    
+    JSON输出模式下整段即为JSON，直接解析，省去查找大括号与切片；
+    前后带有说明文字时解析失败，再按大括号范围提取重试
+    
+    Args:
+        adapter: 目标结构的 TypeAdapter
+        text: AI返回的结果文本
+        
+    Returns:
+        解析后的对象
+        
+    Raises:
+        ValueError: 未找到JSON或JSON与目标结构不符
+    """
+    if text.lstrip().startswith('{'):
+        try:
+            return adapter.validate_json(text)
+        except ValidationError:
+            pass
+    
+    json_start = text.find('{')
+    json_end = text.rfind('}') + 1
+    if json_start == -1 or json_end == 0:
+        raise ValueError("未找到JSON格式的结果")
+    return adapter.validate_json(text[json_start:json_end])
+
+
+# 字符串外影响结构的字符，以及字符串内需要处理的字符；其余字符由正则引擎直接跳过
+_JSON_STRUCTURE = re.compile(r'[{}\[\]",]')
+_JSON_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+class _InnovationStreamScanner:
+    """
+    增量扫描流式输出的JSON，切出 innovations 数组中已经闭合的每一项
+    
+    每个片段只扫描一次并记录扫描状态（嵌套层级、是否在字符串内、当前键名），
+    总开销与响应长度成正比，不必在每个片段到达后重新解析整个缓冲区
+    """
+    
+    def __init__(self):
+        self.chunks: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._key_expected = False  # 根对象中下一个字符串是否为键名
+        self._key_parts: Optional[List[str]] = None  # 正在读取的根对象键名
+        self._last_key = ''
+        self._in_innovations = False
+        self._item_parts: Optional[List[str]] = None  # 正在输出的创新点文本
+    
+    @property
+    def text(self) -> str:
+        """目前收到的全部文本"""
+        return ''.join(self.chunks)
+    
+    def feed(self, chunk: str) -> List[str]:
+        """
+        扫描新收到的片段
+        
+        Args:
+            chunk: AI结果文本片段
+            
+        Returns:
+            本片段内闭合的创新点JSON文本
+        """
+        self.chunks.append(chunk)
+        items = []
+        item_start = 0 if self._item_parts is not None else None
+        key_start = 0 if self._key_parts is not None else None
+        pos = 0
+        
+        while pos < len(chunk):
+            if self._escaped:
+                # 上一个片段以反斜杠结尾，跳过被转义的字符
+                self._escaped = False
+                pos += 1
+                continue
+            
+            if self._in_string:
+                match = _JSON_STRING_SPECIAL.search(chunk, pos)
+                if not match:
+                    break
+                pos = match.end()
+                if match.group() == '\\':
+                    self._escaped = True
+                    continue
+                self._in_string = False
+                if key_start is not None:
+                    self._last_key = ''.join(self._key_parts) + chunk[key_start:match.start()]
+                    self._key_parts = key_start = None
+                continue
+            
+            match = _JSON_STRUCTURE.search(chunk, pos)
+            if not match:
+                break
+            pos = match.end()
+            char = match.group()
+            
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._key_expected:
+                    self._key_expected = False
+                    self._key_parts, key_start = [], pos
+            elif char == ',':
+                self._key_expected = self._depth == 1
+            elif char in '{[':
+                self._depth += 1
+                if self._depth == 1:
+                    self._key_expected = char == '{'
+                elif self._depth == 2 and char == '[' and self._last_key == "innovations":
+                    self._in_innovations = True
+                elif self._depth == 3 and char == '{' and self._in_innovations:
+                    self._item_parts, item_start = [], match.start()
+            else:
+                if self._depth == 3 and char == '}' and self._item_parts is not None:
+                    items.append(''.join(self._item_parts) + chunk[item_start:pos])
+                    self._item_parts = item_start = None
+                elif self._depth == 2:
+                    self._in_innovations = False
+                self._depth -= 1
+        
+        # 跨片段的键名与创新点，先保存本片段中的部分
+        if key_start is not None:
+            self._key_parts.append(chunk[key_start:])
+        if item_start is not None:
+            self._item_parts.append(chunk[item_start:])
+        return items
+
+
 class InnovationExtractor:
     """创新点提取器"""
     
@@ -39,6 +376,9 @@ class InnovationExtractor:
         # 检查DeepSeek API配置
         if not settings.DEEPSEEK_API_KEY:
             logger.warning("未配置DEEPSEEK_API_KEY")
+        
+        # 按 (论文标题, 论文内容) 缓存提取结果，重复提取同一篇论文时不再请求API
+        self._result_cache = ResultCache()
     
     def extract_innovations(self, paper_content: str, paper_title: str) -> Optional[ExtractedInnovations]:
         """
@@ -51,38 +391,269 @@ class InnovationExtractor:
         Returns:
             提取的创新点
         """
+        cache_key, cached, prompt = self._prepare_extraction(paper_content, paper_title)
+        if prompt is None:
+            return cached
+        
+        try:
+            extracted = self._finish_extraction(cache_key, call_ai(prompt, json_mode=True), paper_title)
+        except Exception as e:
+            logger.error(f"提取创新点失败: {e}")
+            logger.error(f"错误类型: {type(e).__name__}")
+            return None
+        
+        if not self._needs_escalation(extracted):
+            return extracted
+        try:
+            escalated = self._finish_extraction(
+                cache_key, call_ai(prompt, model=settings.DEEPSEEK_ESCALATION_MODEL, json_mode=True), paper_title
+            )
+        except Exception as e:
+            logger.warning(f"升级模型提取失败，使用原结果: {e}")
+            escalated = None
+        return escalated or extracted
+    
+    async def aextract_innovations(self, paper_content: str, paper_title: str) -> Optional[ExtractedInnovations]:
+        """
+        异步提取创新点
+        
+        Args:
+            paper_content: 论文内容
+            paper_title: 论文标题
+            
+        Returns:
+            提取的创新点
+        """
+        cache_key, cached, prompt = self._prepare_extraction(paper_content, paper_title)
+        if prompt is None:
+            return cached
+        
+        try:
+            extracted = self._finish_extraction(cache_key, await acall_deepseek(prompt, json_mode=True), paper_title)
+        except Exception as e:
+            logger.error(f"提取创新点失败: {e}")
+            logger.error(f"错误类型: {type(e).__name__}")
+            return None
+        
+        if not self._needs_escalation(extracted):
+            return extracted
+        try:
+            escalated = self._finish_extraction(
+                cache_key,
+                await acall_deepseek(prompt, model=settings.DEEPSEEK_ESCALATION_MODEL, json_mode=True),
+                paper_title
+            )
+        except Exception as e:
+            logger.warning(f"升级模型提取失败，使用原结果: {e}")
+            escalated = None
+        return escalated or extracted
+    
+    def extract_innovations_stream(self, paper_content: str,
+                                   paper_title: str) -> Generator[InnovationPoint, None, Optional[ExtractedInnovations]]:
+        """
+        流式提取创新点，每个创新点在模型输出完整后立即返回，不必等待整个响应
+        
+        Args:
+            paper_content: 论文内容
+            paper_title: 论文标题
+            
+        Yields:
+            已完整输出的创新点
+            
+        Returns:
+            完整的提取结果，失败时为None
+        """
+        cache_key, cached, prompt = self._prepare_extraction(paper_content, paper_title)
+        if prompt is None:
+            if cached:
+                yield from cached.innovations
+            return cached
+        
+        try:
+            extracted = yield from self._parse_extraction_result_stream(
+                stream_deepseek(prompt, json_mode=True), paper_title
+            )
+        except Exception as e:
+            logger.error(f"流式提取创新点失败: {e}")
+            logger.error(f"错误类型: {type(e).__name__}")
+            return None
+        
+        if extracted:
+            self._result_cache.put(cache_key, extracted)
+        return extracted
+    
+    def _prepare_extraction(self, paper_content: str,
+                            paper_title: str) -> Tuple[str, Optional[ExtractedInnovations], Optional[str]]:
+        """
+        准备单篇论文的提取请求
+        
+        Args:
+            paper_content: 论文内容
+            paper_title: 论文标题
+            
+        Returns:
+            (缓存键, 缓存的创新点，未命中时为None, 提示词，无需请求API时为None)
+        """
         logger.info(f"开始提取论文创新点: {paper_title}")
         
+        cache_key = content_key(paper_title, paper_content)
+        cached = self._result_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"使用缓存的创新点: {paper_title}")
+            return cache_key, cached, None
+        
         if not settings.DEEPSEEK_API_KEY:
             logger.error("DeepSeek API密钥未配置")
+            return cache_key, None, None
+        
+        logger.info(f"发送AI请求，论文: {paper_title}")
+        return cache_key, None, self._build_extraction_prompt(paper_content, paper_title)
+    
+    def _needs_escalation(self, extracted: Optional[ExtractedInnovations]) -> bool:
+        """
+        判断是否需要用更强的模型重新提取
+        
+        默认模型速度快、成本低，只有其给出的整体置信度低于阈值时才升级模型
+        
+        Args:
+            extracted: 默认模型的提取结果
+            
+        Returns:
+            配置了升级模型且整体置信度低于阈值时返回True
+        """
+        if not extracted or not settings.DEEPSEEK_ESCALATION_MODEL:
+            return False
+        confidence = extracted.extraction_metadata.get("confidence_overall")
+        if not isinstance(confidence, (int, float)) or confidence >= settings.ESCALATION_CONFIDENCE_THRESHOLD:
+            return False
+        
+        logger.info(f"整体置信度 {confidence} 低于阈值，使用 {settings.DEEPSEEK_ESCALATION_MODEL} 重新提取: "
+                    f"{extracted.paper_title}")
+        return True
+    
+    def _finish_extraction(self, cache_key: str, result_text: Optional[str],
+                           paper_title: str) -> Optional[ExtractedInnovations]:
+        """
+        解析AI返回结果并写入缓存
+        
+        Args:
+            cache_key: 缓存键
+            result_text: AI返回的结果文本
+            paper_title: 论文标题
+            
+        Returns:
+            提取的创新点
+        """
+        if not result_text:
+            logger.error("AI返回空结果")
             return None
         
-        try:
-            prompt = self._build_extraction_prompt(paper_content, paper_title)
-            logger.info(f"发送AI请求，论文: {paper_title}")
+        logger.info(f"AI返回结果，长度: {len(result_text)}")
+        parsed_result = self._parse_extraction_result(result_text, paper_title)
+        if not parsed_result:
+            logger.error("解析AI结果失败")
+            return None
+        
+        logger.info(f"成功解析创新点: {len(parsed_result.innovations)} 个")
+        self._result_cache.put(cache_key, parsed_result)
+        return parsed_result
+    
+    def extract_innovations_batch(self, papers: List[Tuple[str, str]]) -> List[Optional[ExtractedInnovations]]:
+        """
+        在一次AI请求中提取多篇论文的创新点
+        
+        批量结果中缺失或无法解析的论文会退回到单篇提取
+        
+        Args:
+            papers: (论文标题, 论文内容) 列表
+            
+        Returns:
+            与输入顺序一致的创新点列表，提取失败的位置为None
+        """
+        # 已缓存的论文不再发送，只批量提取未命中的论文
+        results = [self._result_cache.get(content_key(title, content)) for title, content in papers]
+        pending = [index for index, result in enumerate(results) if result is None]
+        if len(pending) < len(papers):
+            logger.info(f"{len(papers) - len(pending)} 篇论文使用缓存的创新点")
+        
+        extracted = self._extract_uncached_batch([papers[index] for index in pending])
+        for index, result in zip(pending, extracted):
+            results[index] = result
+        return results
+    
+    def _extract_uncached_batch(self, papers: List[Tuple[str, str]]) -> List[Optional[ExtractedInnovations]]:
+        """
+        在一次AI请求中提取多篇论文的创新点，不查询结果缓存
+        
+        Args:
+            papers: (论文标题, 论文内容) 列表
             
-            result_text = call_ai(prompt)
+        Returns:
+            与输入顺序一致的创新点列表，提取失败的位置为None
+        """
+        if len(papers) <= 1:
+            return self._extract_each(papers)
+        
+        logger.info(f"开始批量提取 {len(papers)} 篇论文的创新点")
+        
+        if not settings.DEEPSEEK_API_KEY:
+            logger.error("DeepSeek API密钥未配置")
+            return [None] * len(papers)
+        
+        titles = [title for title, _ in papers]
+        batch_results = {}
+        try:
+            prompt = self._build_batch_extraction_prompt(papers)
+            max_tokens = min(settings.DEEPSEEK_MAX_TOKENS * len(papers), MAX_OUTPUT_TOKENS)
+            result_text = call_ai(prompt, max_tokens=max_tokens, json_mode=True)
             if result_text:
-                logger.info(f"AI返回结果，长度: {len(result_text)}")
-                parsed_result = self._parse_extraction_result(result_text, paper_title)
-                if parsed_result:
-                    logger.info(f"成功解析创新点: {len(parsed_result.innovations)} 个")
-                    return parsed_result
-                else:
-                    logger.error("解析AI结果失败")
-                    return None
+                logger.info(f"AI返回批量结果，长度: {len(result_text)}")
+                batch_results = self._parse_batch_extraction_result(result_text, titles)
             else:
                 logger.error("AI返回空结果")
-                return None
         except Exception as e:
-            logger.error(f"提取创新点失败: {e}")
+            logger.error(f"批量提取创新点失败: {e}")
             logger.error(f"错误类型: {type(e).__name__}")
-            return None
+        
+        results = [None] * len(papers)
+        missing = []
+        for index, (title, content) in enumerate(papers):
+            extracted = batch_results.get(index)
+            if extracted is None:
+                logger.warning(f"批量结果中缺少该论文，单独提取: {title}")
+                missing.append(index)
+            else:
+                self._result_cache.put(content_key(title, content), extracted)
+                results[index] = extracted
+        
+        for index, extracted in zip(missing, self._extract_each([papers[index] for index in missing])):
+            results[index] = extracted
+        return results
+    
+    def _extract_each(self, papers: List[Tuple[str, str]]) -> List[Optional[ExtractedInnovations]]:
+        """
+        逐篇提取创新点，多篇时各篇的AI请求在线程池中并发发出
+        
+        Args:
+            papers: (论文标题, 论文内容) 列表
+            
+        Returns:
+            与输入顺序一致的创新点列表，提取失败的位置为None
+        """
+        if len(papers) <= 1:
+            return [self.extract_innovations(content, title) for title, content in papers]
+        
+        # 请求耗时主要在等待网络响应，期间释放GIL，线程并发即可重叠各请求的往返时间
+        max_workers = max(1, min(settings.MAX_CONCURRENT_REQUESTS, len(papers)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda paper: self.extract_innovations(paper[1], paper[0]), papers))
     
     def _build_extraction_prompt(self, paper_content: str, paper_title: str) -> str:
         """
         构建提取提示
         
+        固定的说明与JSON格式放在前面，论文内容放在末尾，便于API复用相同前缀的缓存
+        
         Args:
             paper_content: 论文内容
             paper_title: 论文标题
@@ -90,41 +661,32 @@ class InnovationExtractor:
         Returns:
             提示文本
         """
-        return f"""
-请分析以下学术论文，提取其中的创新点。请按照以下格式返回JSON结果：
-
+        return f"""{EXTRACTION_PROMPT_PREFIX}
 论文标题：{paper_title}
 
 论文内容：
-{paper_content[:8000]}  # 限制长度避免token超限
-
-请提取该论文的创新点，并以JSON格式返回：
-
-{{
-    "innovations": [
-        {{
-            "title": "创新点标题",
-            "description": "创新点详细描述",
-            "category": "创新类别（如：算法创新、架构创新、应用创新等）",
-            "impact": "创新影响和意义",
-            "methodology": "实现方法",
-            "novelty_score": 0.85,
-            "confidence": 0.9
-        }}
-    ],
-    "summary": "论文创新点总结",
-    "extraction_metadata": {{
-        "model_used": "使用的模型",
-        "extraction_time": "提取时间",
-        "confidence_overall": 0.85
-    }}
-}}
+{_truncate_content(paper_content)}
+"""
+    
+    def _build_batch_extraction_prompt(self, papers: List[Tuple[str, str]]) -> str:
+        """
+        构建多篇论文的提取提示
+        
+        Args:
+            papers: (论文标题, 论文内容) 列表
+            
+        Returns:
+            提示文本
+        """
+        papers_text = "\n\n".join(
+            f"[论文 {index}]\n论文标题：{title}\n\n论文内容：\n{_truncate_content(content)}"
+            for index, (title, content) in enumerate(papers, 1)
+        )
+        
+        return f"""{BATCH_EXTRACTION_PROMPT_PREFIX}
+以下共 {len(papers)} 篇论文：
 
-要求：
-1. 创新点要具体、可量化
-2. 每个创新点都要有明确的类别和影响评估
-3. novelty_score和confidence都是0-1之间的数值
-4. 确保JSON格式正确
+{papers_text}
 """
     
     def _parse_extraction_result(self, result_text: str, paper_title: str) -> Optional[ExtractedInnovations]:
@@ -139,42 +701,108 @@ class InnovationExtractor:
             解析后的创新点
         """
         try:
-            # 尝试提取JSON部分
+            payload = _validate_json_object(_EXTRACTION_ADAPTER, result_text)
+            return self._build_extracted_innovations(payload, paper_title)
+        except Exception as e:
+            logger.error(f"解析提取结果失败: {e}")
+            return None
+    
+    def _parse_extraction_result_stream(self, chunks: Iterable[str],
+                                        paper_title: str) -> Generator[InnovationPoint, None, Optional[ExtractedInnovations]]:
+        """
+        边接收边解析提取结果
+        
+        Args:
+            chunks: AI返回的结果文本片段
+            paper_title: 论文标题
+            
+        Yields:
+            已完整输出的创新点
+            
+        Returns:
+            整个响应解析出的创新点集合，解析失败时为None
+        """
+        scanner = _InnovationStreamScanner()
+        innovations = []
+        for chunk in chunks:
+            for item in scanner.feed(chunk):
+                # 单项不合法时跳过，不影响已返回和之后的创新点
+                try:
+                    innovation = _INNOVATION_ADAPTER.validate_json(item)
+                except ValidationError as e:
+                    logger.warning(f"跳过无法解析的创新点: {e}")
+                    continue
+                innovations.append(innovation)
+                yield innovation
+        
+        # 创新点已逐项解析，响应结束后只需取出摘要等其余字段
+        try:
+            rest = _validate_json_object(_SUMMARY_ADAPTER, scanner.text)
+        except ValueError as e:
+            logger.error(f"解析提取结果失败: {e}")
+            if not innovations:
+                return None
+            rest = _ExtractionSummary()
+        
+        return ExtractedInnovations(
+            paper_title=paper_title,
+            paper_id="",
+            innovations=innovations,
+            summary=rest.summary,
+            extraction_metadata=rest.extraction_metadata
+        )
+    
+    def _parse_batch_extraction_result(self, result_text: str,
+                                       paper_titles: List[str]) -> Dict[int, ExtractedInnovations]:
+        """
+        解析批量提取结果
+        
+        Args:
+            result_text: AI返回的结果文本
+            paper_titles: 按论文编号排列的论文标题
+            
+        Returns:
+            论文下标（从0开始）到创新点的映射，无法解析的论文不在其中
+        """
+        try:
             json_start = result_text.find('{')
             json_end = result_text.rfind('}') + 1
             
             if json_start == -1 or json_end == 0:
-                logger.error("未找到JSON格式的结果")
-                return None
+                logger.error("未找到JSON格式的批量结果")
+                return {}
             
-            json_str = result_text[json_start:json_end]
-            data = json.loads(json_str)
-            
-            # 解析创新点
-            innovations = []
-            for innovation_data in data.get('innovations', []):
-                innovation = InnovationPoint(
-                    title=innovation_data.get('title', ''),
-                    description=innovation_data.get('description', ''),
-                    category=innovation_data.get('category', ''),
-                    impact=innovation_data.get('impact', ''),
-                    methodology=innovation_data.get('methodology', ''),
-                    novelty_score=float(innovation_data.get('novelty_score', 0.5)),
-                    confidence=float(innovation_data.get('confidence', 0.5))
-                )
-                innovations.append(innovation)
+            payload = _BATCH_EXTRACTION_ADAPTER.validate_json(result_text[json_start:json_end])
             
-            return ExtractedInnovations(
-                paper_title=paper_title,
-                paper_id="",  # 可以从其他地方获取
-                innovations=innovations,
-                summary=data.get('summary', ''),
-                extraction_metadata=data.get('extraction_metadata', {})
-            )
+            results = {}
+            for paper_payload in payload.papers:
+                index = paper_payload.paper_index - 1
+                if 0 <= index < len(paper_titles):
+                    results[index] = self._build_extracted_innovations(paper_payload, paper_titles[index])
+            return results
             
         except Exception as e:
-            logger.error(f"解析提取结果失败: {e}")
-            return None
+            logger.error(f"解析批量提取结果失败: {e}")
+            return {}
+    
+    def _build_extracted_innovations(self, payload: _ExtractionPayload, paper_title: str) -> ExtractedInnovations:
+        """
+        由解析出的JSON结构构建创新点集合
+        
+        Args:
+            payload: 单篇论文的提取结果
+            paper_title: 论文标题
+            
+        Returns:
+            创新点集合
+        """
+        return ExtractedInnovations(
+            paper_title=paper_title,
+            paper_id="",  # 可以从其他地方获取
+            innovations=payload.innovations,
+            summary=payload.summary,
+            extraction_metadata=payload.extraction_metadata
+        )
     
     def save_innovations(self, innovations: ExtractedInnovations, output_path: Path):
         """
@@ -185,29 +813,10 @@ class InnovationExtractor:
             output_path: 输出路径
         """
         try:
-            # 转换为字典格式
-            data = {
-                "paper_title": innovations.paper_title,
-                "paper_id": innovations.paper_id,
-                "innovations": [
-                    {
-                        "title": inn.title,
-                        "description": inn.description,
-                        "category": inn.category,
-                        "impact": inn.impact,
-                        "methodology": inn.methodology,
-                        "novelty_score": inn.novelty_score,
-                        "confidence": inn.confidence
-                    }
-                    for inn in innovations.innovations
-                ],
-                "summary": innovations.summary,
-                "extraction_metadata": innovations.extraction_metadata
-            }
-            
-            # 保存到JSON文件
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            # orjson直接序列化数据类，字段与原先手工构建的字典一致
+            Path(output_path).write_bytes(
+                orjson.dumps(innovations, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            )
             
             logger.info(f"创新点已保存到: {output_path}")
             
@@ -225,30 +834,17 @@ class InnovationExtractor:
             创新点对象
         """
         try:
-            with open(input_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # 构建创新点对象
-            innovations = []
-            for inn_data in data.get("innovations", []):
-                innovation = InnovationPoint(
-                    title=inn_data.get("title", ""),
-                    description=inn_data.get("description", ""),
-                    category=inn_data.get("category", ""),
-                    impact=inn_data.get("impact", ""),
-                    methodology=inn_data.get("methodology", ""),
-                    novelty_score=float(inn_data.get("novelty_score", 0.5)),
-                    confidence=float(inn_data.get("confidence", 0.5))
-                )
-                innovations.append(innovation)
+            # 文件字节一次解析并直接构建为数据类，不经过中间字典
+            payload = _EXTRACTION_ADAPTER.validate_json(Path(input_path).read_bytes())
+            innovations = payload.innovations
             
             # 构建结果对象
             extracted = ExtractedInnovations(
-                paper_title=data.get("paper_title", ""),
-                paper_id=data.get("paper_id", ""),
+                paper_title=payload.paper_title,
+                paper_id=payload.paper_id,
                 innovations=innovations,
-                summary=data.get("summary", ""),
-                extraction_metadata=data.get("extraction_metadata", {})
+                summary=payload.summary,
+                extraction_metadata=payload.extraction_metadata
             )
             
             logger.info(f"成功加载 {len(innovations)} 个创新点")
@@ -267,40 +863,49 @@ class InnovationExtractor:
             output_path: 输出文件路径
         """
         try:
-            data = {
-                'paper_title': extracted.paper_title,
-                'paper_id': extracted.paper_id,
-                'innovations': [
-                    {
-                        'title': innovation.title,
-                        'description': innovation.description,
-                        'category': innovation.category,
-                        'impact': innovation.impact,
-                        'methodology': innovation.methodology,
-                        'novelty_score': innovation.novelty_score,
-                        'confidence': innovation.confidence
-                    }
-                    for innovation in extracted.innovations
-                ],
-                'summary': extracted.summary,
-                'extraction_metadata': extracted.extraction_metadata
-            }
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            Path(output_path).write_bytes(
+                orjson.dumps(extracted, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            )
             
             logger.info(f"创新点已保存: {output_path}")
             
         except Exception as e:
             logger.error(f"保存创新点失败: {e}")
     
-    def batch_extract_innovations(self, parsed_papers: List, output_dir: Path) -> List[ExtractedInnovations]:
+    def batch_extract_innovations(self, parsed_papers: List, output_dir: Path,
+                                  resume_from: Optional[Path] = None) -> List[ExtractedInnovations]:
+        """
+        批量提取创新点（同步接口，需在没有运行中事件循环的线程中调用）
+        
+        Args:
+            parsed_papers: 解析后的论文列表
+            output_dir: 输出目录
+            resume_from: 断点文件（JSONL），见 abatch_extract_innovations
+            
+        Returns:
+            提取的创新点列表
+        """
+        async def run():
+            try:
+                return await self.abatch_extract_innovations(parsed_papers, output_dir, resume_from)
+            finally:
+                # asyncio.run 结束后事件循环即关闭，其上的连接不能再复用
+                await aclose_clients()
+        
+        return asyncio.run(run())
+    
+    async def abatch_extract_innovations(self, parsed_papers: List, output_dir: Path,
+                                         resume_from: Optional[Path] = None) -> List[ExtractedInnovations]:
         """
         批量提取创新点
         
+        各篇论文的AI请求并发发出，同时进行的请求数不超过 MAX_CONCURRENT_REQUESTS
+        
         Args:
             parsed_papers: 解析后的论文列表
             output_dir: 输出目录
+            resume_from: 断点文件（JSONL），每篇论文提取完成后立即追加一行；
+                重新运行时文件中已有的论文（按标题）直接复用结果，不再请求API
             
         Returns:
             提取的创新点列表
@@ -310,11 +915,46 @@ class InnovationExtractor:
         
         logger.info(f"开始批量提取创新点，共 {len(parsed_papers)} 篇论文")
         
+        completed = self._read_checkpoint(resume_from) if resume_from else {}
+        pending = [paper for paper in parsed_papers if paper.title not in completed]
+        if len(pending) < len(parsed_papers):
+            logger.info(f"从断点恢复，跳过 {len(parsed_papers) - len(pending)} 篇已完成的论文")
+        
+        # 内容完全相同的论文（如同一PDF的不同文件名）只请求一次，结果按各自标题复制
+        duplicates: Dict[str, List] = {}
+        for paper in pending:
+            duplicates.setdefault(content_key(paper.full_text), []).append(paper)
+        if len(duplicates) < len(pending):
+            logger.info(f"跳过 {len(pending) - len(duplicates)} 篇内容重复的论文")
+        
+        # 请求耗时主要在等待网络响应，并发后总耗时约为 论文数/并发数 次请求
+        semaphore = asyncio.Semaphore(max(1, settings.MAX_CONCURRENT_REQUESTS))
+        
+        with (open(resume_from, 'ab') if resume_from else nullcontext()) as checkpoint:
+            async def bounded(papers):
+                async with semaphore:
+                    extracted = await self.aextract_innovations(papers[0].full_text, papers[0].title)
+                if not extracted:
+                    return []
+                
+                results = [(papers[0].title, extracted)]
+                results.extend((paper.title, replace(extracted, paper_title=paper.title)) for paper in papers[1:])
+                if checkpoint:
+                    # 逐篇落盘，任务中途失败时已完成的论文不必重做
+                    for _, result in results:
+                        checkpoint.write(orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS) + b"\n")
+                    checkpoint.flush()
+                    os.fsync(checkpoint.fileno())
+                return results
+            
+            for results in await asyncio.gather(*(bounded(papers) for papers in duplicates.values())):
+                completed.update(results)
+        
+        # 结果按原顺序依次保存
         for i, paper in enumerate(parsed_papers, 1):
             logger.info(f"提取进度: {i}/{len(parsed_papers)}")
             
-            # 提取创新点
-            extracted = self.extract_innovations(paper.full_text, paper.title)
+            extracted = completed.get(paper.title)
             if extracted:
                 # 保存结果
                 output_file = output_dir / f"{paper.title.replace(' ', '_')[:50]}_innovations.json"
@@ -322,4 +962,39 @@ class InnovationExtractor:
                 extracted_innovations.append(extracted)
         
         logger.info(f"批量提取完成，成功提取 {len(extracted_innovations)} 篇论文的创新点")
-        return extracted_innovations 
\ No newline at end of file
+        return extracted_innovations
+    
+    def _read_checkpoint(self, checkpoint: Path) -> Dict[str, ExtractedInnovations]:
+        """
+        读取断点文件中已完成的提取结果，并截掉中断时写了一半的末行
+        
+        Args:
+            checkpoint: 断点文件（JSONL），每行一篇论文的提取结果
+            
+        Returns:
+            论文标题到创新点的映射，文件不存在时为空
+        """
+        completed = {}
+        if not Path(checkpoint).exists():
+            return completed
+        
+        with open(checkpoint, 'rb+') as f:
+            valid_end = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # 末行不完整，截掉后新结果从最后一个完整行之后追加，该论文重新提取
+                    f.truncate(valid_end)
+                    break
+                valid_end += len(line)
+                try:
+                    payload = _EXTRACTION_ADAPTER.validate_json(line)
+                except ValidationError:
+                    continue
+                completed[payload.paper_title] = ExtractedInnovations(
+                    paper_title=payload.paper_title,
+                    paper_id=payload.paper_id,
+                    innovations=payload.innovations,
+                    summary=payload.summary,
+                    extraction_metadata=payload.extraction_metadata
+                )
+        return completed
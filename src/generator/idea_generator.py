@@ -1,32 +1,82 @@
 """
 创新点组合生成模块
 """
-import json
+import heapq
+import orjson
+import asyncio
 import itertools
-from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass
+from collections import Counter, defaultdict
+from operator import attrgetter
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
 from pathlib import Path
 from loguru import logger
+from pydantic import TypeAdapter, ValidationError
 from config.settings import settings
 from src.extractor.innovation_extractor import InnovationPoint, ExtractedInnovations
-from src.utils.ai_client import call_ai
+from src.utils.ai_client import call_ai, acall_deepseek, aclose_clients, content_key, ResultCache
 
+# 筛选后保留的想法数量
+MAX_RANKED_IDEAS = 20
+# 单次AI生成请求中最多包含的创新点数，超出的创新点分到并发的其他请求中
+AI_PROMPT_MAX_INNOVATIONS = 20
 
-@dataclass
+# 提示词中固定不变的说明与JSON格式，随系统消息发送；主题和创新点放在用户消息中，
+# 使多次请求共享相同前缀，命中API的前缀缓存
+AI_GENERATION_PROMPT_PREFIX = """
+基于用户消息中给出的研究主题和现有创新点，请提出5-10个新的研究方向和创新想法。
+
+请分析这些创新点的模式和趋势，提出新的研究方向。要求：
+
+1. 每个想法都要有明确的标题和详细描述
+2. 评估可行性和潜在影响
+3. 提供实施路径和研究方向
+4. 确保想法具有创新性和实用性
+
+请以JSON格式返回：
+
+{
+    "generated_ideas": [
+        {
+            "title": "新想法标题",
+            "description": "详细描述",
+            "source_innovations": ["相关创新点1", "相关创新点2"],
+            "combination_type": "ai_generated",
+            "feasibility_score": 0.8,
+            "novelty_score": 0.9,
+            "impact_potential": 0.85,
+            "implementation_path": "实施路径",
+            "research_directions": ["研究方向1", "研究方向2"]
+        }
+    ]
+}
+
+确保JSON格式正确，所有评分都是0-1之间的数值。
+"""
+
+AI_GENERATION_SYSTEM_PROMPT = "你是一个创新研究专家，擅长基于现有创新点提出新的研究方向。"
+
+# 系统提示与固定说明在导入时拼接一次，作为系统消息发送；
+# 每次请求只有用户消息中的主题和创新点不同，系统消息部分可命中API的前缀缓存
+_AI_GENERATION_STATIC_PROMPT = f"{AI_GENERATION_SYSTEM_PROMPT}\n\n{AI_GENERATION_PROMPT_PREFIX}"
+
+
+@dataclass(slots=True)
 class GeneratedIdea:
-    """生成的新想法"""
-    title: str
-    description: str
-    source_innovations: List[str]
-    combination_type: str
-    feasibility_score: float
-    novelty_score: float
-    impact_potential: float
-    implementation_path: str
-    research_directions: List[str]
+    """生成的新想法（默认值即AI结果中缺少对应字段时的取值）"""
+    title: str = ''
+    description: str = ''
+    source_innovations: List[str] = field(default_factory=list)
+    combination_type: str = 'ai_generated'
+    feasibility_score: float = 0.5
+    novelty_score: float = 0.5
+    impact_potential: float = 0.5
+    implementation_path: str = ''
+    research_directions: List[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class IdeaGenerationResult:
     """想法生成结果"""
     topic: str
@@ -35,6 +85,36 @@ class IdeaGenerationResult:
     generation_metadata: Dict
 
 
+@dataclass
+class _AIIdeasPayload:
+    """AI生成结果的JSON结构"""
+    generated_ideas: List[GeneratedIdea] = field(default_factory=list)
+
+
+# AI返回的JSON由pydantic（Rust实现）一次解析并直接构建为 GeneratedIdea，
+# 不再经过 json.loads 得到的中间字典
+_AI_IDEAS_ADAPTER = TypeAdapter(_AIIdeasPayload)
+
+
+@lru_cache(maxsize=4096)
+def _score_combo(novelty_scores: Tuple[float, ...],
+                 confidences: Tuple[float, ...]) -> Tuple[float, float, float]:
+    """
+    计算组合想法的评分，评分组合相同的候选复用计算结果
+    
+    Args:
+        novelty_scores: 各创新点的新颖性评分
+        confidences: 各创新点的置信度
+        
+    Returns:
+        (可行性, 新颖性, 影响潜力)
+    """
+    avg_novelty = sum(novelty_scores) / len(novelty_scores)
+    avg_confidence = sum(confidences) / len(confidences)
+    # 组合可能产生更高新颖性
+    return avg_confidence * 0.8, avg_novelty * 1.2, avg_novelty * avg_confidence
+
+
 class IdeaGenerator:
     """创新想法生成器"""
     
@@ -42,12 +122,38 @@ class IdeaGenerator:
         # 检查DeepSeek API配置
         if not settings.DEEPSEEK_API_KEY:
             logger.warning("未配置DEEPSEEK_API_KEY")
+        
+        # 按 (研究主题, 创新点) 缓存AI生成的想法，相同输入不再请求API
+        self._ai_ideas_cache = ResultCache()
     
     def generate_ideas_from_innovations(self, innovations_list: List[ExtractedInnovations], 
                                       topic: str) -> Optional[IdeaGenerationResult]:
         """
+        从创新点生成新想法（同步接口，需在没有运行中事件循环的线程中调用）
+        
+        Args:
+            innovations_list: 创新点列表
+            topic: 研究主题
+            
+        Returns:
+            生成的想法结果
+        """
+        async def run():
+            try:
+                return await self.agenerate_ideas_from_innovations(innovations_list, topic)
+            finally:
+                # asyncio.run 结束后事件循环即关闭，其上的连接不能再复用
+                await aclose_clients()
+        
+        return asyncio.run(run())
+    
+    async def agenerate_ideas_from_innovations(self, innovations_list: List[ExtractedInnovations],
+                                             topic: str) -> Optional[IdeaGenerationResult]:
+        """
         从创新点生成新想法
         
+        创新点按每次请求的上限分组，各组的AI请求并发发出，同时在线程中计算组合想法
+        
         Args:
             innovations_list: 创新点列表
             topic: 研究主题
@@ -66,14 +172,19 @@ class IdeaGenerator:
             logger.error("没有可用的创新点")
             return None
         
-        # 生成组合想法
-        combined_ideas = self._generate_combination_ideas(all_innovations, topic)
-        
-        # 使用AI生成新想法
-        ai_generated_ideas = self._generate_ai_ideas(all_innovations, topic)
+        # AI生成以网络等待为主，各组请求并发进行，总耗时约等于最慢的一次请求；
+        # 本地组合计算放到线程中同时进行
+        chunks = [
+            all_innovations[i:i + AI_PROMPT_MAX_INNOVATIONS]
+            for i in range(0, len(all_innovations), AI_PROMPT_MAX_INNOVATIONS)
+        ]
+        combined_ideas, *ai_results = await asyncio.gather(
+            asyncio.to_thread(self._generate_combination_ideas, all_innovations, topic),
+            *(self._agenerate_ai_ideas(chunk, topic) for chunk in chunks)
+        )
         
         # 合并所有想法
-        all_ideas = combined_ideas + ai_generated_ideas
+        all_ideas = list(itertools.chain(combined_ideas, *ai_results))
         
         # 排序和筛选
         filtered_ideas = self._filter_and_rank_ideas(all_ideas)
@@ -102,40 +213,38 @@ class IdeaGenerator:
             组合生成的想法
         """
         ideas = []
+        for combo, combination_type in self._iter_combinations(innovations):
+            idea = self._create_combination_idea(list(combo), combination_type)
+            if idea:
+                ideas.append(idea)
         
+        return ideas
+    
+    @staticmethod
+    def _iter_combinations(innovations: List[InnovationPoint]) -> Iterator[Tuple[Tuple[InnovationPoint, ...], str]]:
+        """
+        按类别分桶后逐个产出待组合的创新点，只枚举会被使用的组合
+        
+        Args:
+            innovations: 创新点列表
+            
+        Yields:
+            (要组合的创新点, 组合类型)
+        """
         # 按类别分组创新点
-        categories = {}
+        categories = defaultdict(list)
         for innovation in innovations:
-            category = innovation.category
-            if category not in categories:
-                categories[category] = []
-            categories[category].append(innovation)
-        
-        # 同类别内组合
-        for category, category_innovations in categories.items():
-            if len(category_innovations) >= 2:
-                combinations = list(itertools.combinations(category_innovations, 2))
-                for combo in combinations[:10]:  # 限制组合数量
-                    idea = self._create_combination_idea(list(combo), "intra_category")
-                    if idea:
-                        ideas.append(idea)
-        
-        # 跨类别组合
-        if len(categories) >= 2:
-            category_names = list(categories.keys())
-            for i in range(len(category_names)):
-                for j in range(i + 1, len(category_names)):
-                    cat1, cat2 = category_names[i], category_names[j]
-                    innovations1 = categories[cat1][:3]  # 取前3个
-                    innovations2 = categories[cat2][:3]
-                    
-                    for inv1 in innovations1:
-                        for inv2 in innovations2:
-                            idea = self._create_combination_idea([inv1, inv2], "cross_category")
-                            if idea:
-                                ideas.append(idea)
+            categories[innovation.category].append(innovation)
         
-        return ideas
+        # 同类别内组合，每个类别只取前10个组合，不必先生成全部 O(n²) 个组合
+        for category_innovations in categories.values():
+            for combo in itertools.islice(itertools.combinations(category_innovations, 2), 10):
+                yield combo, "intra_category"
+        
+        # 跨类别组合，每个类别取前3个
+        for cat1, cat2 in itertools.combinations(categories, 2):
+            for combo in itertools.product(categories[cat1][:3], categories[cat2][:3]):
+                yield combo, "cross_category"
     
     def _create_combination_idea(self, innovations: List[InnovationPoint], 
                                combination_type: str) -> Optional[GeneratedIdea]:
@@ -152,9 +261,10 @@ class IdeaGenerator:
         if len(innovations) < 2:
             return None
         
-        # 计算综合评分
-        avg_novelty = sum(inv.novelty_score for inv in innovations) / len(innovations)
-        avg_confidence = sum(inv.confidence for inv in innovations) / len(innovations)
+        feasibility, novelty, impact = _score_combo(
+            tuple(inv.novelty_score for inv in innovations),
+            tuple(inv.confidence for inv in innovations)
+        )
         
         # 生成想法标题和描述
         titles = [inv.title for inv in innovations]
@@ -170,9 +280,9 @@ class IdeaGenerator:
             description=combined_description,
             source_innovations=titles,
             combination_type=combination_type,
-            feasibility_score=avg_confidence * 0.8,
-            novelty_score=avg_novelty * 1.2,  # 组合可能产生更高新颖性
-            impact_potential=avg_novelty * avg_confidence,
+            feasibility_score=feasibility,
+            novelty_score=novelty,
+            impact_potential=impact,
             implementation_path="需要进一步研究和实验验证",
             research_directions=[f"结合{title}的方法" for title in titles]
         )
@@ -194,36 +304,100 @@ class IdeaGenerator:
             return []
         
         try:
-            # 准备创新点数据
-            innovations_data = []
-            for inv in innovations[:20]:  # 限制数量避免token超限
-                innovations_data.append({
-                    "title": inv.title,
-                    "description": inv.description,
-                    "category": inv.category,
-                    "novelty_score": inv.novelty_score
-                })
-            
-            prompt = self._build_ai_generation_prompt(innovations_data, topic)
-            
-            # 使用 DeepSeek 生成新想法
-            system_prompt = "你是一个创新研究专家，擅长基于现有创新点提出新的研究方向。"
-            full_prompt = f"{system_prompt}\n\n{prompt}"
-            result_text = call_ai(full_prompt)
-            
-            if result_text:
-                return self._parse_ai_generation_result(result_text)
-            else:
-                logger.warning("AI返回空结果")
-                return []
+            cache_key, cached, prompt = self._prepare_ai_request(innovations, topic)
+            if cached is not None:
+                return cached
+            return self._finish_ai_request(
+                cache_key, call_ai(prompt, system=_AI_GENERATION_STATIC_PROMPT, json_mode=True)
+            )
+        except Exception as e:
+            logger.error(f"AI生成想法失败: {e}")
+            return []
+    
+    async def _agenerate_ai_ideas(self, innovations: List[InnovationPoint],
+                                  topic: str) -> List[GeneratedIdea]:
+        """
+        使用AI生成新想法（异步）
+        
+        Args:
+            innovations: 创新点列表
+            topic: 研究主题
             
+        Returns:
+            AI生成的想法
+        """
+        if not settings.DEEPSEEK_API_KEY:
+            logger.warning("DeepSeek API不可用，跳过AI想法生成")
+            return []
+        
+        try:
+            cache_key, cached, prompt = self._prepare_ai_request(innovations, topic)
+            if cached is not None:
+                return cached
+            return self._finish_ai_request(
+                cache_key, await acall_deepseek(prompt, system=_AI_GENERATION_STATIC_PROMPT, json_mode=True)
+            )
         except Exception as e:
             logger.error(f"AI生成想法失败: {e}")
             return []
     
+    def _prepare_ai_request(self, innovations: List[InnovationPoint],
+                            topic: str) -> Tuple[str, Optional[List[GeneratedIdea]], str]:
+        """
+        准备AI生成请求
+        
+        Args:
+            innovations: 创新点列表
+            topic: 研究主题
+            
+        Returns:
+            (缓存键, 缓存的想法，未命中时为None, 用户消息提示词)
+        """
+        # 准备创新点数据
+        innovations_data = []
+        for inv in innovations[:AI_PROMPT_MAX_INNOVATIONS]:  # 限制数量避免token超限
+            innovations_data.append({
+                "title": inv.title,
+                "description": inv.description,
+                "category": inv.category,
+                "novelty_score": inv.novelty_score
+            })
+        
+        cache_key = content_key(topic, orjson.dumps(innovations_data, option=orjson.OPT_SORT_KEYS).decode())
+        cached = self._ai_ideas_cache.get(cache_key)
+        if cached is not None:
+            logger.info("使用缓存的AI生成想法")
+            # 排序时会改写评分，返回副本以免影响缓存内容
+            return cache_key, [replace(idea) for idea in cached], ""
+        
+        # 使用 DeepSeek 生成新想法
+        return cache_key, None, self._build_ai_generation_prompt(innovations_data, topic)
+    
+    def _finish_ai_request(self, cache_key: str, result_text: Optional[str]) -> List[GeneratedIdea]:
+        """
+        解析AI返回结果并写入缓存
+        
+        Args:
+            cache_key: 缓存键
+            result_text: AI返回的结果文本
+            
+        Returns:
+            AI生成的想法
+        """
+        if not result_text:
+            logger.warning("AI返回空结果")
+            return []
+        
+        ideas = self._parse_ai_generation_result(result_text)
+        if ideas:
+            self._ai_ideas_cache.put(cache_key, [replace(idea) for idea in ideas])
+        return ideas
+    
     def _build_ai_generation_prompt(self, innovations_data: List[Dict], topic: str) -> str:
         """
-        构建AI生成提示
+        构建AI生成请求的用户消息
+        
+        固定的说明与JSON格式在系统消息 _AI_GENERATION_STATIC_PROMPT 中，这里只包含主题和创新点
         
         Args:
             innovations_data: 创新点数据
@@ -237,40 +411,10 @@ class IdeaGenerator:
             for inv in innovations_data
         ])
         
-        return f"""
-基于以下研究主题和现有创新点，请提出5-10个新的研究方向和创新想法：
-
-研究主题：{topic}
+        return f"""研究主题：{topic}
 
 现有创新点：
 {innovations_text}
-
-请分析这些创新点的模式和趋势，提出新的研究方向。要求：
-
-1. 每个想法都要有明确的标题和详细描述
-2. 评估可行性和潜在影响
-3. 提供实施路径和研究方向
-4. 确保想法具有创新性和实用性
-
-请以JSON格式返回：
-
-{{
-    "generated_ideas": [
-        {{
-            "title": "新想法标题",
-            "description": "详细描述",
-            "source_innovations": ["相关创新点1", "相关创新点2"],
-            "combination_type": "ai_generated",
-            "feasibility_score": 0.8,
-            "novelty_score": 0.9,
-            "impact_potential": 0.85,
-            "implementation_path": "实施路径",
-            "research_directions": ["研究方向1", "研究方向2"]
-        }}
-    ]
-}}
-
-确保JSON格式正确，所有评分都是0-1之间的数值。
 """
     
     def _parse_ai_generation_result(self, result_text: str) -> List[GeneratedIdea]:
@@ -284,6 +428,14 @@ class IdeaGenerator:
             解析后的想法列表
         """
         try:
+            # 整段即为JSON时直接解析，省去查找大括号与切片；
+            # 前后带有说明文字时解析失败，再按大括号范围提取重试
+            if result_text.lstrip().startswith('{'):
+                try:
+                    return _AI_IDEAS_ADAPTER.validate_json(result_text).generated_ideas
+                except ValidationError:
+                    pass
+            
             # 提取JSON部分
             json_start = result_text.find('{')
             json_end = result_text.rfind('}') + 1
@@ -293,24 +445,7 @@ class IdeaGenerator:
                 return []
             
             json_str = result_text[json_start:json_end]
-            data = json.loads(json_str)
-            
-            ideas = []
-            for idea_data in data.get('generated_ideas', []):
-                idea = GeneratedIdea(
-                    title=idea_data.get('title', ''),
-                    description=idea_data.get('description', ''),
-                    source_innovations=idea_data.get('source_innovations', []),
-                    combination_type=idea_data.get('combination_type', 'ai_generated'),
-                    feasibility_score=float(idea_data.get('feasibility_score', 0.5)),
-                    novelty_score=float(idea_data.get('novelty_score', 0.5)),
-                    impact_potential=float(idea_data.get('impact_potential', 0.5)),
-                    implementation_path=idea_data.get('implementation_path', ''),
-                    research_directions=idea_data.get('research_directions', [])
-                )
-                ideas.append(idea)
-            
-            return ideas
+            return _AI_IDEAS_ADAPTER.validate_json(json_str).generated_ideas
             
         except Exception as e:
             logger.error(f"解析AI生成结果失败: {e}")
@@ -330,11 +465,9 @@ class IdeaGenerator:
         for idea in ideas:
             idea.impact_potential = (idea.novelty_score + idea.feasibility_score) / 2
         
-        # 按综合评分排序
-        ideas.sort(key=lambda x: x.impact_potential, reverse=True)
-        
-        # 返回前20个想法
-        return ideas[:20]
+        # 只取综合评分最高的20个，部分选择 O(n log k)，无需对全部想法排序；
+        # 结果与稳定排序后取前20个一致
+        return heapq.nlargest(MAX_RANKED_IDEAS, ideas, key=attrgetter('impact_potential'))
     
     def _generate_analysis_summary(self, innovations: List[InnovationPoint], 
                                  ideas: List[GeneratedIdea]) -> str:
@@ -348,17 +481,9 @@ class IdeaGenerator:
         Returns:
             分析总结
         """
-        # 统计创新点类别
-        categories = {}
-        for inv in innovations:
-            category = inv.category
-            categories[category] = categories.get(category, 0) + 1
-        
-        # 统计想法类型
-        combination_types = {}
-        for idea in ideas:
-            combo_type = idea.combination_type
-            combination_types[combo_type] = combination_types.get(combo_type, 0) + 1
+        # 统计创新点类别与想法类型（Counter 在C层计数，保持首次出现的顺序）
+        categories = Counter(inv.category for inv in innovations)
+        combination_types = Counter(idea.combination_type for idea in ideas)
         
         summary = f"""
 分析总结：
@@ -372,37 +497,20 @@ class IdeaGenerator:
         
         return summary
     
-    def save_generation_result(self, result: IdeaGenerationResult, output_path: Path):
+    def save_generation_result(self, result: IdeaGenerationResult, output_path: Path,
+                               opener: Callable[[Path, str], BinaryIO] = open):
         """
         保存生成结果
         
         Args:
             result: 生成结果
             output_path: 输出文件路径
+            opener: 以 (路径, 模式) 打开输出文件的函数，默认为内置 open；
+                测试中可传入返回内存缓冲区的函数以免写磁盘
         """
         try:
-            data = {
-                'topic': result.topic,
-                'generated_ideas': [
-                    {
-                        'title': idea.title,
-                        'description': idea.description,
-                        'source_innovations': idea.source_innovations,
-                        'combination_type': idea.combination_type,
-                        'feasibility_score': idea.feasibility_score,
-                        'novelty_score': idea.novelty_score,
-                        'impact_potential': idea.impact_potential,
-                        'implementation_path': idea.implementation_path,
-                        'research_directions': idea.research_directions
-                    }
-                    for idea in result.generated_ideas
-                ],
-                'analysis_summary': result.analysis_summary,
-                'generation_metadata': result.generation_metadata
-            }
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with opener(output_path, 'wb') as f:
+                f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
             
             logger.info(f"生成结果已保存: {output_path}")
             
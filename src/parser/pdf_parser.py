@@ -1,16 +1,59 @@
 """
 PDF论文解析模块
 """
+import os
 import re
+import mmap
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from itertools import repeat
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from dataclasses import dataclass
 import pdfplumber
+import pypdfium2 as pdfium
 import PyPDF2
 from loguru import logger
 
+# PyMuPDF体积较大，部分部署环境（如Vercel）未安装
+try:
+    import fitz
+except ImportError:
+    fitz = None
 
-@dataclass
+
+# 摘要只在论文开头的这部分字符中查找
+ABSTRACT_SCAN_CHARS = 8000
+# 参考文献优先在论文末尾 1/N 的文本中查找
+REFERENCE_TAIL_DIVISOR = 4
+# 元数据和文件名都没有标题时，在正文开头的这些行中猜测标题
+TITLE_SCAN_LINES = 15
+# 输出目录中记录各PDF解析时 (修改时间, 文件大小) 的索引文件
+PARSED_INDEX_NAME = ".parsed_index.json"
+
+# 摘要/参考文献先定位标题，再从标题之后查找结束位置，两次都是线性扫描，
+# 避免 (.*?) 加前瞻断言在长文本上的逐字符回溯
+_ABSTRACT_ANCHOR = re.compile(r'(?:ABSTRACT|摘要)\s*\n', re.IGNORECASE)
+_ABSTRACT_END = re.compile(r'\n[A-Z]+\s*\n|\n\d+\.\s*[A-Z]|\n[A-Z][a-z]+:', re.IGNORECASE)
+_REFERENCE_ANCHOR = re.compile(r'(?:REFERENCES|参考文献)\s*\n', re.IGNORECASE)
+_REFERENCE_END = re.compile(r'\n[A-Z]+\s*\n', re.IGNORECASE)
+# 一条编号参考文献：编号所在行及其后不以编号开头的续行，finditer 一遍扫描即可取出全部条目
+_REFERENCE_ENTRY = re.compile(r'^[ \t]*\[\d+\][ \t]*(.*(?:\n(?![ \t]*\[\d+\]).*)*)', re.MULTILINE)
+# 含有这些章节/图表关键词的行不作为标题候选
+_TITLE_EXCLUDE_PATTERN = re.compile(
+    r'abstract|introduction|method|result|conclusion|references|appendix|acknowledgment|figure|table',
+    re.IGNORECASE
+)
+# 章节标题候选行：只含可能出现在标题中的字符，且以大写字母或冒号结尾，
+# 绝大多数正文行在这一步就被正则引擎直接排除，剩余候选再由 section_patterns 精确校验
+_SECTION_CANDIDATE_PATTERN = re.compile(
+    r'^[ \t\r\f\v]*([0-9A-Za-z.:][0-9A-Za-z.: \t\r\f\v]*[A-Z:])[ \t\r\f\v]*$',
+    re.MULTILINE
+)
+
+
+@dataclass(slots=True)
 class PaperSection:
     """论文章节"""
     title: str
@@ -18,9 +61,26 @@ class PaperSection:
     level: int
     start_page: int
     end_page: int
+    start_offset: int = 0  # 章节正文在全文中的起始字符偏移
+    end_offset: int = 0  # 章节正文在全文中的结束字符偏移
+    
+    def get_content(self, full_text: str) -> str:
+        """
+        获取章节内容，未保存内容时按偏移从全文中切出
+        
+        Args:
+            full_text: 论文全文
+            
+        Returns:
+            章节内容
+        """
+        if self.content:
+            return self.content
+        body = full_text[self.start_offset:self.end_offset]
+        return '\n'.join(filter(None, map(str.strip, body.splitlines())))
 
 
-@dataclass
+@dataclass(slots=True)
 class ParsedPaper:
     """解析后的论文"""
     title: str
@@ -32,16 +92,59 @@ class ParsedPaper:
     metadata: Dict
 
 
+@contextmanager
+def _mmap_pdf(pdf_path: Path) -> Iterator[mmap.mmap]:
+    """
+    以只读内存映射方式打开PDF，由操作系统按需换入页面，避免整文件读入内存
+    
+    Args:
+        pdf_path: PDF文件路径
+        
+    Yields:
+        只读的内存映射对象，可直接作为文件流交给PDF库
+    """
+    with open(pdf_path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+def _join_pages(pages: Iterable[str]) -> str:
+    """
+    一次性拼接逐页文本，每页后追加换行，避免在循环中反复拼接字符串
+    
+    Args:
+        pages: 逐页文本
+        
+    Returns:
+        拼接后的全文
+    """
+    return ''.join(f"{page}\n" for page in pages)
+
+
 class PDFParser:
     """PDF论文解析器"""
     
-    def __init__(self):
+    # 文本提取库，按速度从快到慢排列
+    TEXT_BACKENDS = ("pypdfium2", "pymupdf", "pdfplumber", "pypdf2")
+    
+    def __init__(self, backend: Optional[str] = None):
+        """
+        Args:
+            backend: 优先使用的文本提取库，取值见 TEXT_BACKENDS；失败时按默认顺序回退
+        """
+        if backend is not None and backend not in self.TEXT_BACKENDS:
+            raise ValueError(f"不支持的PDF解析库: {backend}")
+        self.backend = backend
+        # 预编译，逐行校验时不再经过 re 模块的编译缓存查找
         self.section_patterns = [
-            r'^\d+\.\s*([A-Z][A-Z\s]+)$',  # 1. INTRODUCTION
-            r'^([A-Z][A-Z\s]+)$',  # ABSTRACT, REFERENCES
-            r'^\d+\.\d+\s*([A-Z][A-Z\s]+)$',  # 1.1 Background
-            r'^([A-Z][a-z\s]+):$',  # Abstract:, Conclusion:
+            re.compile(r'^\d+\.\s*([A-Z][A-Z\s]+)$'),  # 1. INTRODUCTION
+            re.compile(r'^([A-Z][A-Z\s]+)$'),  # ABSTRACT, REFERENCES
+            re.compile(r'^\d+\.\d+\s*([A-Z][A-Z\s]+)$'),  # 1.1 Background
+            re.compile(r'^([A-Z][a-z\s]+):$'),  # Abstract:, Conclusion:
         ]
+        # 合并为一个按顺序尝试的分支正则，每个候选行只需匹配一次；
+        # 各分支只有一个捕获组，命中分支的标题即 lastindex 对应的组
+        self._section_re = re.compile('|'.join(pattern.pattern for pattern in self.section_patterns))
     
     def extract_text_from_pdf(self, pdf_path: Path) -> Optional[str]:
         """
@@ -56,30 +159,106 @@ class PDFParser:
         try:
             logger.info(f"开始解析PDF: {pdf_path}")
             
-            # 尝试使用pdfplumber
-            try:
-                with pdfplumber.open(pdf_path) as pdf:
-                    text = ""
-                    for page in pdf.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + "\n"
-                    return text
-            except Exception as e:
-                logger.warning(f"pdfplumber解析失败，尝试PyPDF2: {e}")
-                
-                # 备用方案：使用PyPDF2
-                with open(pdf_path, 'rb') as file:
-                    reader = PyPDF2.PdfReader(file)
-                    text = ""
-                    for page in reader.pages:
-                        text += page.extract_text() + "\n"
+            # 优先使用指定的解析库，其余按速度从快到慢依次尝试
+            backends = {
+                "pypdfium2": self._iter_pdfium_pages,
+                "pymupdf": self._iter_pymupdf_pages,
+                "pdfplumber": self._iter_pdfplumber_pages,
+                "pypdf2": self._iter_pypdf2_pages,
+            }
+            if fitz is None:
+                del backends["pymupdf"]
+            for name in sorted(backends, key=lambda name: name != self.backend):
+                try:
+                    text = _join_pages(backends[name](pdf_path))
+                except Exception as e:
+                    logger.warning(f"{name}解析失败，尝试下一种方式: {e}")
+                    continue
+                # 快速的解析库偶尔取不到文本（如特殊字体编码），此时换用下一种方式
+                if text.strip():
                     return text
-                    
+                logger.warning(f"{name}未提取到文本，尝试下一种方式")
+            
+            logger.error(f"PDF解析失败 {pdf_path}: 所有解析方式均失败")
+            return None
+            
         except Exception as e:
             logger.error(f"PDF解析失败 {pdf_path}: {e}")
             return None
     
+    @staticmethod
+    def _iter_pdfium_pages(pdf_path: Path) -> Iterator[str]:
+        """
+        使用pypdfium2（pdfium的C绑定）逐页产出文本，跳过无文本的页面
+        
+        Args:
+            pdf_path: PDF文件路径
+            
+        Yields:
+            单页文本
+        """
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            for page in pdf:
+                textpage = page.get_textpage()
+                page_text = textpage.get_text_range().replace('\r\n', '\n')
+                textpage.close()
+                page.close()
+                if page_text:
+                    yield page_text
+        finally:
+            pdf.close()
+    
+    @staticmethod
+    def _iter_pymupdf_pages(pdf_path: Path) -> Iterator[str]:
+        """
+        使用PyMuPDF逐页产出文本，跳过无文本的页面
+        
+        Args:
+            pdf_path: PDF文件路径
+            
+        Yields:
+            单页文本
+        """
+        with fitz.open(pdf_path) as doc:
+            for page in doc:
+                page_text = page.get_text("text")
+                if page_text:
+                    yield page_text
+    
+    @staticmethod
+    def _iter_pdfplumber_pages(pdf_path: Path) -> Iterator[str]:
+        """
+        使用pdfplumber逐页产出文本，跳过无文本的页面
+        
+        Args:
+            pdf_path: PDF文件路径
+            
+        Yields:
+            单页文本
+        """
+        with pdfplumber.open(pdf_path) as pdf:
+            for page in pdf.pages:
+                page_text = page.extract_text()
+                if page_text:
+                    yield page_text
+    
+    @staticmethod
+    def _iter_pypdf2_pages(pdf_path: Path) -> Iterator[str]:
+        """
+        使用PyPDF2逐页产出文本
+        
+        Args:
+            pdf_path: PDF文件路径
+            
+        Yields:
+            单页文本
+        """
+        with _mmap_pdf(pdf_path) as mm:
+            reader = PyPDF2.PdfReader(mm)
+            for page in reader.pages:
+                yield page.extract_text()
+    
     def extract_metadata(self, pdf_path: Path) -> Dict:
         """
         提取PDF元数据
@@ -90,9 +269,25 @@ class PDFParser:
         Returns:
             元数据字典
         """
+        # PyMuPDF直接读取文档信息字典，无需PyPDF2在Python中解析整个交叉引用表
+        if fitz is not None:
+            try:
+                with fitz.open(pdf_path) as doc:
+                    metadata = doc.metadata or {}
+                    return {
+                        'title': metadata.get('title') or '',
+                        'author': metadata.get('author') or '',
+                        'subject': metadata.get('subject') or '',
+                        'creator': metadata.get('creator') or '',
+                        'producer': metadata.get('producer') or '',
+                        'pages': doc.page_count
+                    }
+            except Exception as e:
+                logger.warning(f"PyMuPDF读取元数据失败，尝试PyPDF2: {e}")
+        
         try:
-            with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
+            with _mmap_pdf(pdf_path) as mm:
+                reader = PyPDF2.PdfReader(mm)
                 metadata = reader.metadata
                 return {
                     'title': metadata.get('/Title', ''),
@@ -106,64 +301,77 @@ class PDFParser:
             logger.error(f"提取元数据失败 {pdf_path}: {e}")
             return {}
     
-    def identify_sections(self, text: str) -> List[PaperSection]:
+    def identify_sections(self, text: str, keep_content: bool = True) -> List[PaperSection]:
         """
         识别论文章节
         
         Args:
             text: 论文文本
+            keep_content: 是否生成章节内容字符串，为False时只记录偏移，
+                内容通过 PaperSection.get_content 按需获取
             
         Returns:
             章节列表
         """
+        # 一遍扫描全文：遇到下一个章节标题时，上一个标题到此处之间即为上一章节的正文
         sections = []
-        lines = text.split('\n')
-        current_section = None
-        current_content = []
-        
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if not line:
-                continue
+        pending = None  # 尚未结束的章节：(标题, 层级, 标题行号, 正文起始偏移)
+        line_no = 0
+        last_pos = 0
+        for candidate in _SECTION_CANDIDATE_PATTERN.finditer(text):
+            line = candidate.group(1)
             
             # 检查是否是章节标题
-            is_section = False
-            section_title = ""
-            
-            for pattern in self.section_patterns:
-                match = re.match(pattern, line)
-                if match:
-                    is_section = True
-                    section_title = match.group(1).strip()
-                    break
-            
-            if is_section:
-                # 保存前一个章节
-                if current_section and current_content:
-                    current_section.content = '\n'.join(current_content)
-                    sections.append(current_section)
-                
-                # 开始新章节
-                level = 1 if '.' in line else 2
-                current_section = PaperSection(
-                    title=section_title,
-                    content="",
-                    level=level,
-                    start_page=i,
-                    end_page=i
-                )
-                current_content = []
-            else:
-                if current_section:
-                    current_content.append(line)
+            match = self._section_re.match(line)
+            if not match:
+                continue
+            
+            if pending:
+                self._append_section(sections, text, *pending, candidate.start(), keep_content)
+            
+            line_no += text.count('\n', last_pos, candidate.start())
+            last_pos = candidate.start()
+            level = 1 if '.' in line else 2
+            pending = (match.group(match.lastindex).strip(), level, line_no, candidate.end())
         
-        # 保存最后一个章节
-        if current_section and current_content:
-            current_section.content = '\n'.join(current_content)
-            sections.append(current_section)
+        if pending:
+            self._append_section(sections, text, *pending, len(text), keep_content)
         
         return sections
     
+    @staticmethod
+    def _append_section(sections: List[PaperSection], text: str, title: str, level: int,
+                        start_line: int, body_start: int, body_end: int, keep_content: bool):
+        """
+        将标题之后的正文作为一个章节追加到列表，正文为空时跳过
+        
+        Args:
+            sections: 章节列表，原地追加
+            text: 论文文本
+            title: 章节标题
+            level: 章节层级
+            start_line: 标题所在行号
+            body_start: 正文起始偏移
+            body_end: 正文结束偏移（下一个标题的起始位置）
+            keep_content: 是否生成章节内容字符串
+        """
+        body = text[body_start:body_end].rstrip()
+        if not body:
+            return
+        
+        section = PaperSection(
+            title=title,
+            content="",
+            level=level,
+            start_page=start_line,
+            end_page=start_line + body.count('\n'),
+            start_offset=body_start,
+            end_offset=body_start + len(body)
+        )
+        if keep_content:
+            section.content = section.get_content(text)
+        sections.append(section)
+    
     def extract_abstract(self, text: str) -> str:
         """
         提取摘要
@@ -174,17 +382,13 @@ class PDFParser:
         Returns:
             摘要内容
         """
-        # 查找摘要部分
-        abstract_patterns = [
-            r'ABSTRACT\s*\n(.*?)(?=\n[A-Z]+\s*\n|\n\d+\.\s*[A-Z]|\n[A-Z][a-z]+:)',
-            r'Abstract\s*\n(.*?)(?=\n[A-Z]+\s*\n|\n\d+\.\s*[A-Z]|\n[A-Z][a-z]+:)',
-            r'摘要\s*\n(.*?)(?=\n[A-Z]+\s*\n|\n\d+\.\s*[A-Z]|\n[A-Z][a-z]+:)',
-        ]
-        
-        for pattern in abstract_patterns:
-            match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-            if match:
-                return match.group(1).strip()
+        # 摘要位于论文开头，只扫描头部
+        head = text[:ABSTRACT_SCAN_CHARS]
+        anchor = _ABSTRACT_ANCHOR.search(head)
+        if anchor:
+            end = _ABSTRACT_END.search(head, anchor.end())
+            if end:
+                return head[anchor.end():end.start()].strip()
         
         return ""
     
@@ -198,29 +402,38 @@ class PDFParser:
         Returns:
             参考文献列表
         """
-        references = []
+        # 参考文献位于论文末尾，先扫描尾部，未命中再回退到全文
+        tail = text[len(text) - len(text) // REFERENCE_TAIL_DIVISOR:]
+        ref_text = self._find_references_block(tail)
+        if ref_text is None:
+            ref_text = self._find_references_block(text)
+        if ref_text is None:
+            return []
         
-        # 查找参考文献部分
-        ref_patterns = [
-            r'REFERENCES\s*\n(.*?)(?=\n[A-Z]+\s*\n|$)',
-            r'References\s*\n(.*?)(?=\n[A-Z]+\s*\n|$)',
-            r'参考文献\s*\n(.*?)(?=\n[A-Z]+\s*\n|$)',
-        ]
-        
-        for pattern in ref_patterns:
-            match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-            if match:
-                ref_text = match.group(1)
-                # 分割参考文献条目
-                ref_entries = re.split(r'\n\s*\[\d+\]', ref_text)
-                for entry in ref_entries:
-                    entry = entry.strip()
-                    if entry:
-                        references.append(entry)
-                break
+        references = [entry for match in _REFERENCE_ENTRY.finditer(ref_text) if (entry := match.group(1).strip())]
+        if not references and ref_text.strip():
+            # 没有 [n] 编号的参考文献格式，整体作为一条返回
+            references.append(ref_text.strip())
         
         return references
     
+    @staticmethod
+    def _find_references_block(text: str) -> Optional[str]:
+        """
+        定位参考文献部分
+        
+        Args:
+            text: 待查找的文本
+            
+        Returns:
+            参考文献部分的文本，未找到时返回None
+        """
+        anchor = _REFERENCE_ANCHOR.search(text)
+        if not anchor:
+            return None
+        end = _REFERENCE_END.search(text, anchor.end())
+        return text[anchor.end():end.start() if end else len(text)]
+    
     def parse_paper(self, pdf_path: Path) -> Optional[ParsedPaper]:
         """
         解析完整论文
@@ -242,8 +455,8 @@ class PDFParser:
             # 提取元数据
             metadata = self.extract_metadata(pdf_path)
             
-            # 识别章节
-            sections = self.identify_sections(text)
+            # 识别章节，内容以偏移形式引用全文
+            sections = self.identify_sections(text, keep_content=False)
             
             # 提取摘要
             abstract = self.extract_abstract(text)
@@ -253,7 +466,7 @@ class PDFParser:
             
             # 构建解析结果
             parsed_paper = ParsedPaper(
-                title=metadata.get('title', ''),
+                title=self._guess_title(pdf_path, metadata.get('title', ''), text),
                 abstract=abstract,
                 authors=metadata.get('author', '').split(';') if metadata.get('author') else [],
                 sections=sections,
@@ -269,6 +482,38 @@ class PDFParser:
             logger.error(f"解析论文失败 {pdf_path}: {e}")
             return None
     
+    @staticmethod
+    def _guess_title(pdf_path: Path, metadata_title: str, text: str) -> str:
+        """
+        确定论文标题
+        
+        依次使用PDF元数据中的标题、文件名（去掉ArXiv ID前缀）、正文开头的第一条像标题的行
+        
+        Args:
+            pdf_path: PDF文件路径
+            metadata_title: 元数据中的标题
+            text: 论文全文
+            
+        Returns:
+            论文标题，无法确定时返回空字符串
+        """
+        title = metadata_title
+        if not title:
+            # 下载的文件名形如 {arxiv_id}_{标题}.pdf
+            parts = pdf_path.stem.split("_", 1)
+            title = (parts[1] if len(parts) > 1 else pdf_path.stem).replace("_", " ")
+        
+        if title and not title.startswith("Paper_"):
+            return title
+        
+        # 只切分开头几行，不必切分整篇全文
+        for line in text.split('\n', TITLE_SCAN_LINES)[:TITLE_SCAN_LINES]:
+            line = line.strip()
+            if 10 < len(line) < 200 and not _TITLE_EXCLUDE_PATTERN.search(line):
+                return line
+        
+        return title
+    
     def save_parsed_paper(self, parsed_paper: ParsedPaper, output_path: Path):
         """
         保存解析结果
@@ -278,7 +523,7 @@ class PDFParser:
             output_path: 输出文件路径
         """
         try:
-            import json
+            import orjson
             from datetime import datetime
             
             # 转换为可序列化的格式
@@ -289,52 +534,284 @@ class PDFParser:
                 'sections': [
                     {
                         'title': section.title,
-                        'content': section.content,
                         'level': section.level,
                         'start_page': section.start_page,
-                        'end_page': section.end_page
+                        'end_page': section.end_page,
+                        'start_offset': section.start_offset,
+                        'end_offset': section.end_offset
                     }
                     for section in parsed_paper.sections
                 ],
                 'references': parsed_paper.references,
+                'full_text': parsed_paper.full_text,
                 'metadata': parsed_paper.metadata,
                 'parsed_at': datetime.now().isoformat()
             }
             
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
             
             logger.info(f"解析结果已保存: {output_path}")
             
         except Exception as e:
             logger.error(f"保存解析结果失败: {e}")
     
-    def batch_parse_papers(self, pdf_dir: Path, output_dir: Path) -> List[ParsedPaper]:
+    def load_parsed_paper(self, input_path: Path) -> Optional[ParsedPaper]:
+        """
+        从文件加载解析结果
+        
+        Args:
+            input_path: 解析结果文件路径
+            
+        Returns:
+            解析后的论文对象
+        """
+        try:
+            import orjson
+            
+            with open(input_path, 'rb') as f:
+                data = orjson.loads(f.read())
+            
+            sections = [
+                PaperSection(
+                    title=section.get('title', ''),
+                    content=section.get('content', ''),
+                    level=section.get('level', 1),
+                    start_page=section.get('start_page', 0),
+                    end_page=section.get('end_page', 0),
+                    start_offset=section.get('start_offset', 0),
+                    end_offset=section.get('end_offset', 0)
+                )
+                for section in data.get('sections', [])
+            ]
+            
+            return ParsedPaper(
+                title=data.get('title', ''),
+                abstract=data.get('abstract', ''),
+                authors=data.get('authors', []),
+                sections=sections,
+                references=data.get('references', []),
+                full_text=data.get('full_text', ''),
+                metadata=data.get('metadata', {})
+            )
+            
+        except Exception as e:
+            logger.error(f"加载解析结果失败 {input_path}: {e}")
+            return None
+    
+    def batch_parse_papers(self, pdf_dir: Path, output_dir: Optional[Path], force: bool = False,
+                           max_workers: Optional[int] = None) -> List[ParsedPaper]:
         """
         批量解析论文
         
+        PDF的修改时间和大小与上次解析时一致（没有索引记录时为解析结果比PDF更新）的论文直接复用已有结果，
+        不再重新解析；其余PDF的解析是CPU密集型任务，分发到多个进程并行执行
+        
         Args:
             pdf_dir: PDF文件目录
-            output_dir: 输出目录
+            output_dir: 输出目录，为None时只在内存中返回解析结果，不读写解析文件
+            force: 是否忽略已有解析结果强制重新解析
+            max_workers: 解析进程数，默认为CPU核数，为1时在当前进程内串行解析；
+                在Web服务或其后台线程中调用时应传1，避免在多线程的服务进程中创建进程池
             
         Returns:
             解析后的论文列表
         """
-        output_dir.mkdir(parents=True, exist_ok=True)
-        parsed_papers = []
+        index_file = None
+        if output_dir is not None:
+            output_dir.mkdir(parents=True, exist_ok=True)
+            index_file = output_dir / PARSED_INDEX_NAME
+        index = self._load_parsed_index(index_file) if index_file else {}
         
-        pdf_files = list(pdf_dir.glob("*.pdf"))
+        pdf_files = _list_pdfs(pdf_dir)
         logger.info(f"开始批量解析 {len(pdf_files)} 个PDF文件")
         
-        for i, pdf_file in enumerate(pdf_files, 1):
-            logger.info(f"解析进度: {i}/{len(pdf_files)}")
+        results: Dict[int, ParsedPaper] = {}
+        pending: List[Tuple[int, Path, Optional[Path]]] = []
+        signatures: Dict[int, List[int]] = {}
+        for i, pdf_file in enumerate(pdf_files):
+            output_file = output_dir / f"{pdf_file.stem}_parsed.json" if output_dir is not None else None
+            # 在解析之前记录PDF状态，解析期间PDF被修改时下次仍会重新解析
+            signature = _file_signature(pdf_file) if output_file else None
+            if signature:
+                signatures[i] = signature
+            
+            # 解析结果已是最新时直接加载
+            if output_file and not force and self._is_up_to_date(pdf_file, output_file,
+                                                                 index.get(pdf_file.name), signature):
+                cached_paper = self.load_parsed_paper(output_file)
+                if cached_paper and cached_paper.full_text:
+                    logger.info(f"跳过已解析的论文: {pdf_file.name}")
+                    results[i] = cached_paper
+                    continue
             
-            parsed_paper = self.parse_paper(pdf_file)
+            pending.append((i, pdf_file, output_file))
+        
+        workers = min(max_workers or os.cpu_count() or 1, len(pending))
+        
+        if workers > 1:
+            # 解析结果的序列化与写盘同样在工作进程中完成，主进程只收集结果
+            pending_pdfs = [pdf_file for _, pdf_file, _ in pending]
+            output_files = [output_file for _, _, output_file in pending]
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    parsed = executor.map(_parse_one, pending_pdfs, repeat(self.backend), output_files)
+                    self._collect_parsed(pending, parsed, results, save=False)
+            except (OSError, NotImplementedError, BrokenProcessPool) as e:
+                # 无法创建进程池（如没有 /dev/shm 的无服务器环境）或工作进程异常退出时，
+                # 已收集的结果保留，其余论文改为在当前进程内解析
+                logger.warning(f"多进程解析失败，改为在当前进程内解析: {e}")
+                pending = [item for item in pending if item[0] not in results]
+                workers = 1
+        
+        if workers <= 1:
+            pending_pdfs = [pdf_file for _, pdf_file, _ in pending]
+            self._collect_parsed(pending, map(self.parse_paper, pending_pdfs), results)
+        
+        if index_file and pending:
+            for i, pdf_file, _ in pending:
+                if i in results and i in signatures:
+                    index[pdf_file.name] = signatures[i]
+            self._save_parsed_index(index, index_file)
+        
+        parsed_papers = [results[i] for i in sorted(results)]
+        logger.info(f"批量解析完成，成功解析 {len(parsed_papers)} 篇论文")
+        return parsed_papers
+    
+    def _collect_parsed(self, pending: List[Tuple[int, Path, Optional[Path]]],
+                        parsed: Iterable[Optional[ParsedPaper]],
+                        results: Dict[int, ParsedPaper], save: bool = True):
+        """
+        按完成顺序保存解析结果
+        
+        Args:
+            pending: 待解析的 (序号, PDF路径, 输出路径) 列表，输出路径为None时不保存
+            parsed: 与 pending 一一对应的解析结果
+            results: 序号到解析结果的映射，原地更新
+            save: 是否写入解析文件，工作进程已写入时为False
+        """
+        for done, ((i, pdf_file, output_file), parsed_paper) in enumerate(zip(pending, parsed), 1):
+            logger.info(f"解析进度: {done}/{len(pending)}")
             if parsed_paper:
                 # 保存解析结果
-                output_file = output_dir / f"{pdf_file.stem}_parsed.json"
-                self.save_parsed_paper(parsed_paper, output_file)
-                parsed_papers.append(parsed_paper)
+                if save and output_file:
+                    self.save_parsed_paper(parsed_paper, output_file)
+                results[i] = parsed_paper
+    
+    @staticmethod
+    def _is_up_to_date(pdf_file: Path, output_file: Path, recorded: Optional[List[int]] = None,
+                       signature: Optional[List[int]] = None) -> bool:
+        """
+        判断解析结果是否仍对应当前的PDF文件
         
-        logger.info(f"批量解析完成，成功解析 {len(parsed_papers)} 篇论文")
-        return parsed_papers 
\ No newline at end of file
+        Args:
+            pdf_file: PDF文件路径
+            output_file: 解析结果文件路径
+            recorded: 索引中上次解析时的 [修改时间(ns), 文件大小]
+            signature: PDF当前的 [修改时间(ns), 文件大小]
+            
+        Returns:
+            解析结果存在，且PDF与索引记录一致（无记录时解析结果不早于PDF）时返回True
+        """
+        if recorded is not None and signature is not None:
+            # 直接比较 stat 结果，被替换为修改时间更早的PDF也能识别出来
+            return recorded == signature and output_file.exists()
+        try:
+            return output_file.stat().st_mtime >= pdf_file.stat().st_mtime
+        except OSError:
+            return False
+    
+    @staticmethod
+    def _load_parsed_index(index_file: Path) -> Dict[str, List[int]]:
+        """
+        读取解析索引，文件不存在或已损坏时返回空索引
+        
+        Args:
+            index_file: 索引文件路径
+            
+        Returns:
+            PDF文件名到 [修改时间(ns), 文件大小] 的映射
+        """
+        import orjson
+        
+        try:
+            index = orjson.loads(index_file.read_bytes())
+        except (OSError, orjson.JSONDecodeError):
+            return {}
+        return index if isinstance(index, dict) else {}
+    
+    @staticmethod
+    def _save_parsed_index(index: Dict[str, List[int]], index_file: Path):
+        """
+        写入解析索引，先写临时文件再替换，中途中断不会留下半截索引
+        
+        Args:
+            index: PDF文件名到 [修改时间(ns), 文件大小] 的映射
+            index_file: 索引文件路径
+        """
+        import orjson
+        
+        try:
+            tmp_file = index_file.with_name(f"{index_file.name}.{os.getpid()}.tmp")
+            tmp_file.write_bytes(orjson.dumps(index))
+            os.replace(tmp_file, index_file)
+        except OSError as e:
+            logger.error(f"保存解析索引失败 {index_file}: {e}")
+
+
+def _file_signature(path: Path) -> Optional[List[int]]:
+    """
+    文件的 [修改时间(ns), 文件大小]，用于判断文件自上次解析后是否变化
+    
+    Args:
+        path: 文件路径
+        
+    Returns:
+        修改时间与大小，无法访问文件时为None
+    """
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _list_pdfs(pdf_dir: Path) -> List[Path]:
+    """
+    列出目录下的PDF文件（不递归），按文件名排序
+    
+    os.scandir 直接使用目录项自带的文件类型，不像 Path.glob 那样为每个条目构造路径对象并再次stat
+    
+    Args:
+        pdf_dir: PDF文件目录
+        
+    Returns:
+        PDF文件路径列表
+    """
+    return sorted(
+        Path(entry.path) for entry in os.scandir(pdf_dir)
+        if entry.name.endswith(".pdf") and entry.is_file(follow_symlinks=False)
+    )
+
+
+def _parse_one(pdf_path: Path, backend: Optional[str] = None,
+               output_file: Optional[Path] = None) -> Optional[ParsedPaper]:
+    """
+    在工作进程中解析单篇论文
+    
+    进程池只能分发模块级函数，每个进程各自创建解析器并打开PDF
+    
+    Args:
+        pdf_path: PDF文件路径
+        backend: 优先使用的文本提取后端
+        output_file: 解析结果输出路径，为None时不保存
+        
+    Returns:
+        解析后的论文对象
+    """
+    parser = PDFParser(backend)
+    parsed_paper = parser.parse_paper(pdf_path)
+    if parsed_paper and output_file:
+        parser.save_parsed_paper(parsed_paper, output_file)
+    return parsed_paper
+
@@ -2,15 +2,17 @@
 Streamlit用户界面 - 一键式创新点生成器
 """
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from pathlib import Path
-import json
-from typing import List, Dict
+import orjson
+import re
+from typing import List, Dict, Optional, Tuple
 import sys
 import os
 import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from datetime import datetime
 
 # 添加项目根目录到Python路径
@@ -23,6 +25,167 @@ from src.extractor.innovation_extractor import InnovationExtractor, ExtractedInn
 from src.generator.idea_generator import IdeaGenerator
 
 
+# 会话结果目录中供历史记录侧边栏读取的摘要文件
+HISTORY_META_FILE = "meta.json"
+
+# 后台流程运行期间刷新进度的间隔（秒）
+PIPELINE_POLL_SECONDS = 0.5
+
+# 历史结果分析图表用到的想法字段
+IDEA_CHART_COLUMNS = ("title", "novelty_score", "feasibility_score", "impact_potential", "combination_type")
+
+# 文件名中只保留字母、数字、下划线、空格和连字符
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^\w \-]')
+
+# 页面样式与卡片模板在模块加载时构建一次，渲染时只需 format 填充字段
+_CUSTOM_CSS = """
+<style>
+.main-header {
+    background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
+    padding: 2rem;
+    border-radius: 10px;
+    margin-bottom: 2rem;
+    text-align: center;
+    color: white;
+}
+
+.innovation-card {
+    background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
+    padding: 1.5rem;
+    border-radius: 10px;
+    margin: 1rem 0;
+    border-left: 4px solid #667eea;
+    box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+}
+
+.idea-card {
+    background: linear-gradient(135deg, #ffecd2 0%, #fcb69f 100%);
+    padding: 1.5rem;
+    border-radius: 10px;
+    margin: 1rem 0;
+    border-left: 4px solid #ff6b6b;
+    box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+}
+
+.metric-card {
+    background: white;
+    padding: 1rem;
+    border-radius: 8px;
+    text-align: center;
+    box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
+}
+
+.progress-step {
+    background: #e3f2fd;
+    padding: 1rem;
+    border-radius: 8px;
+    margin: 0.5rem 0;
+    border-left: 3px solid #2196f3;
+}
+
+.success-step {
+    background: #e8f5e8;
+    border-left-color: #4caf50;
+}
+
+.error-step {
+    background: #ffebee;
+    border-left-color: #f44336;
+}
+</style>
+"""
+
+_MAIN_HEADER_HTML = (
+    '<div class="main-header">'
+    '<h1>🧠 智能论文创新点生成器</h1>'
+    '<p>一键搜索论文，自动提取创新点，生成新的研究方向</p>'
+    '</div>'
+)
+
+_METRIC_CARD_TPL = '<div class="metric-card"><h3>{icon} {value}</h3><p>{label}</p></div>'
+
+_INNOVATION_CARD_TPL = (
+    '<div class="innovation-card">'
+    '<h4>💡 创新点 {index}: {inv.title}</h4>'
+    '<p><strong>📋 描述:</strong> {inv.description}</p>'
+    '<p><strong>🏷️ 类别:</strong> {inv.category}</p>'
+    '<p><strong>🎯 影响:</strong> {inv.impact}</p>'
+    '<p><strong>🔬 方法:</strong> {inv.methodology}</p>'
+    '<div style="display: flex; gap: 20px; margin-top: 10px;">'
+    '<span><strong>⭐ 新颖性:</strong> {inv.novelty_score:.2f}</span>'
+    '<span><strong>🎯 置信度:</strong> {inv.confidence:.2f}</span>'
+    '</div>'
+    '</div>'
+)
+
+_IDEA_CARD_TPL = (
+    '<div class="idea-card">'
+    '<h4>🚀 想法 {index}: {idea.title}</h4>'
+    '<p><strong>📋 描述:</strong> {idea.description}</p>'
+    '<p><strong>🔗 来源创新点:</strong> {sources}</p>'
+    '<p><strong>🔄 组合类型:</strong> {idea.combination_type}</p>'
+    '<p><strong>🛤️ 实施路径:</strong> {idea.implementation_path}</p>'
+    '<div style="display: flex; gap: 20px; margin: 10px 0;">'
+    '<span><strong>⭐ 新颖性:</strong> {idea.novelty_score:.2f}</span>'
+    '<span><strong>🎯 可行性:</strong> {idea.feasibility_score:.2f}</span>'
+    '<span><strong>🚀 影响潜力:</strong> {idea.impact_potential:.2f}</span>'
+    '</div>'
+    '<div style="margin-top: 15px;">'
+    '<strong>🔬 研究方向:</strong>'
+    '<ul>{directions}</ul>'
+    '</div>'
+    '</div>'
+)
+
+_PROGRESS_STEP_TPL = '<div class="progress-step {css}">{text}</div>'
+
+_SUMMARY_CARD_TPL = '<div class="innovation-card"><h4>🎯 总体分析</h4><p>{summary}</p></div>'
+
+
+@dataclass
+class PipelineJob:
+    """
+    在后台线程中运行的一次完整流程
+    
+    工作线程只向 events 队列写入事件，界面线程每次重绘时取出事件更新步骤状态和日志
+    """
+    search_query: str
+    session_dir: Path
+    events: queue.Queue = field(default_factory=queue.Queue)
+    steps: Dict[int, Tuple[str, str]] = field(default_factory=dict)  # 步骤序号 -> (样式, 文本)
+    logs: List[str] = field(default_factory=list)
+    result: Optional[Dict] = None
+    done: bool = False
+    saved: bool = False
+    
+    def step(self, index: int, text: str, css: str = ""):
+        """报告步骤状态（工作线程调用）"""
+        self.events.put(("step", index, css, text))
+    
+    def log(self, text: str):
+        """报告一条详细日志（工作线程调用）"""
+        self.events.put(("log", text))
+    
+    def finish(self, result: Optional[Dict]):
+        """报告流程结束（工作线程调用）"""
+        self.events.put(("done", result))
+    
+    def drain(self):
+        """取出所有待处理事件（界面线程调用）"""
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                return
+            if event[0] == "step":
+                self.steps[event[1]] = (event[2], event[3])
+            elif event[0] == "log":
+                self.logs.append(event[1])
+            else:
+                self.result = event[1]
+                self.done = True
+
+
 def main():
     """主应用函数"""
     st.set_page_config(
@@ -33,70 +196,10 @@ def main():
     )
     
     # 自定义CSS样式
-    st.markdown("""
-    <style>
-    .main-header {
-        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-        padding: 2rem;
-        border-radius: 10px;
-        margin-bottom: 2rem;
-        text-align: center;
-        color: white;
-    }
-    
-    .innovation-card {
-        background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
-        padding: 1.5rem;
-        border-radius: 10px;
-        margin: 1rem 0;
-        border-left: 4px solid #667eea;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-    }
-    
-    .idea-card {
-        background: linear-gradient(135deg, #ffecd2 0%, #fcb69f 100%);
-        padding: 1.5rem;
-        border-radius: 10px;
-        margin: 1rem 0;
-        border-left: 4px solid #ff6b6b;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-    }
-    
-    .metric-card {
-        background: white;
-        padding: 1rem;
-        border-radius: 8px;
-        text-align: center;
-        box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
-    }
-    
-    .progress-step {
-        background: #e3f2fd;
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 0.5rem 0;
-        border-left: 3px solid #2196f3;
-    }
-    
-    .success-step {
-        background: #e8f5e8;
-        border-left-color: #4caf50;
-    }
-    
-    .error-step {
-        background: #ffebee;
-        border-left-color: #f44336;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    st.markdown(_CUSTOM_CSS, unsafe_allow_html=True)
     
     # 主标题
-    st.markdown("""
-    <div class="main-header">
-        <h1>🧠 智能论文创新点生成器</h1>
-        <p>一键搜索论文，自动提取创新点，生成新的研究方向</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_MAIN_HEADER_HTML, unsafe_allow_html=True)
     
     # 侧边栏
     with st.sidebar:
@@ -131,6 +234,12 @@ def main():
     
     with tab3:
         show_detailed_process_page()
+    
+    # 后台流程尚未结束时定时重绘以刷新进度，等待期间用户仍可操作页面
+    job = st.session_state.get("pipeline_job")
+    if job is not None and not job.done:
+        time.sleep(PIPELINE_POLL_SECONDS)
+        st.rerun()
 
 
 def show_one_click_generation_page(max_papers: int):
@@ -151,28 +260,26 @@ def show_one_click_generation_page(max_papers: int):
         st.write("")  # 占位符
         generate_button = st.button("🚀 开始生成", type="primary", use_container_width=True)
     
+    job = st.session_state.get("pipeline_job")
+    
     if generate_button and search_query:
-        # 创建会话目录
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        session_dir = settings.DATA_DIR / f"session_{timestamp}"
-        
-        # 执行完整流程
-        result = run_complete_pipeline(search_query, max_papers, session_dir)
-        
-        if result:
-            st.success("🎉 创新点生成完成！")
-            
-            # 显示结果
-            display_innovation_results(result)
-            
-            # 保存结果到会话目录
-            save_session_results(result, session_dir, search_query)
+        if job is not None and not job.done:
+            st.warning("⚠️ 已有流程正在运行，请等待其完成")
         else:
-            st.error("❌ 生成失败，请检查网络连接和API配置")
+            # 创建会话目录
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            session_dir = settings.DATA_DIR / f"session_{timestamp}"
+            
+            # 在后台线程中执行完整流程
+            job = start_pipeline_job(search_query, max_papers, session_dir)
+            st.session_state.pipeline_job = job
     
     elif generate_button and not search_query:
         st.warning("⚠️ 请输入搜索主题")
     
+    if job is not None:
+        show_pipeline_job(job)
+    
     # 显示示例
     st.markdown("---")
     st.subheader("💡 搜索示例")
@@ -193,8 +300,96 @@ def show_one_click_generation_page(max_papers: int):
                 st.rerun()
 
 
-def run_complete_pipeline(search_query: str, max_papers: int, session_dir: Path) -> Dict | None:
-    """运行完整的论文分析流程"""
+def start_pipeline_job(search_query: str, max_papers: int, session_dir: Path) -> PipelineJob:
+    """
+    在后台线程中启动完整流程
+    
+    Args:
+        search_query: 搜索主题
+        max_papers: 最大论文数量
+        session_dir: 会话目录
+        
+    Returns:
+        流程任务
+    """
+    job = PipelineJob(search_query=search_query, session_dir=session_dir)
+    # 服务对象在界面线程中获取，工作线程不访问 st.* 缓存
+    services = _get_services()
+    
+    def worker():
+        try:
+            result = run_complete_pipeline(search_query, max_papers, session_dir, job, services)
+        except Exception as e:
+            job.log(f"❌ 流程异常终止: {str(e)}")
+            result = None
+        job.finish(result)
+    
+    threading.Thread(target=worker, name=f"pipeline-{session_dir.name}", daemon=True).start()
+    return job
+
+
+def show_pipeline_job(job: PipelineJob):
+    """显示后台流程的进度，流程结束后显示并保存结果"""
+    job.drain()
+    
+    st.markdown("### 📋 处理进度")
+    steps_html = ''.join(
+        _PROGRESS_STEP_TPL.format(css=css, text=text)
+        for _, (css, text) in sorted(job.steps.items())
+    )
+    if steps_html:
+        st.markdown(steps_html, unsafe_allow_html=True)
+    
+    if job.logs:
+        with st.expander("📜 详细日志"):
+            st.markdown("\n".join(f"- {line}" for line in job.logs))
+    
+    if not job.done:
+        st.info("⏳ 流程在后台运行中，可以继续浏览历史记录和其他页面")
+    elif job.result:
+        st.success("🎉 创新点生成完成！")
+        
+        # 显示结果
+        display_innovation_results(job.result)
+        
+        # 保存结果到会话目录，只保存一次
+        if not job.saved:
+            save_session_results(job.result, job.session_dir, job.search_query)
+            job.saved = True
+    else:
+        st.error("❌ 生成失败，请检查网络连接和API配置")
+
+
+@st.cache_resource
+def _get_services() -> Tuple[ArXivCrawler, PDFParser, InnovationExtractor, IdeaGenerator]:
+    """
+    创建流程所需的服务对象，跨重绘和会话共享
+    
+    这些对象不保存会话相关的状态，爬虫的下载会话等连接池也随之复用
+    
+    Returns:
+        (爬虫, 解析器, 创新点提取器, 想法生成器)
+    """
+    return ArXivCrawler(), PDFParser(), InnovationExtractor(), IdeaGenerator()
+
+
+def run_complete_pipeline(search_query: str, max_papers: int, session_dir: Path,
+                          job: PipelineJob, services: Tuple) -> Dict | None:
+    """
+    运行完整的论文分析流程
+    
+    在后台线程中运行，不能调用 st.*，进度通过 job 的事件队列交给界面线程显示
+    
+    Args:
+        search_query: 搜索主题
+        max_papers: 最大论文数量
+        session_dir: 会话目录
+        job: 接收进度事件的任务
+        services: (爬虫, 解析器, 创新点提取器, 想法生成器)
+        
+    Returns:
+        流程结果，失败时返回None
+    """
     
     # 创建目录结构
     papers_dir = session_dir / "papers"
@@ -205,216 +400,208 @@ def run_complete_pipeline(search_query: str, max_papers: int, session_dir: Path)
     for directory in [papers_dir, extracted_dir, innovations_dir, results_dir]:
         directory.mkdir(parents=True, exist_ok=True)
     
-    # 进度追踪
-    progress_container = st.container()
+    crawler, parser, extractor, generator = services
+    
+    # 步骤1: 搜索论文
+    job.step(1, '🔍 步骤1: 搜索论文中...')
     
-    with progress_container:
-        st.markdown("### 📋 处理进度")
+    try:
+        papers = crawler.search_papers(search_query, max_papers)
         
-        # 步骤1: 搜索论文
-        step1_placeholder = st.empty()
-        step1_placeholder.markdown('<div class="progress-step">🔍 步骤1: 搜索论文中...</div>', unsafe_allow_html=True)
+        if not papers:
+            job.step(1, '❌ 步骤1: 未找到相关论文', "error-step")
+            return None
         
-        try:
-            crawler = ArXivCrawler()
-            crawler.papers_dir = papers_dir
-            
-            papers = crawler.search_papers(search_query, max_papers)
-            
-            if not papers:
-                step1_placeholder.markdown('<div class="progress-step error-step">❌ 步骤1: 未找到相关论文</div>', unsafe_allow_html=True)
-                return None
-            
-            step1_placeholder.markdown(f'<div class="progress-step success-step">✅ 步骤1: 找到 {len(papers)} 篇论文</div>', unsafe_allow_html=True)
-            
-            # 显示论文信息
-            with st.expander(f"📄 查看找到的 {len(papers)} 篇论文"):
-                for i, paper in enumerate(papers, 1):
-                    st.write(f"**{i}. {paper.title}**")
-                    st.write(f"作者: {', '.join(paper.authors)}")
-                    st.write(f"摘要: {paper.abstract[:200]}...")
-                    st.write("---")
-            
-        except Exception as e:
-            step1_placeholder.markdown(f'<div class="progress-step error-step">❌ 步骤1: 搜索失败 - {str(e)}</div>', unsafe_allow_html=True)
+        job.step(1, f'✅ 步骤1: 找到 {len(papers)} 篇论文', "success-step")
+        
+        # 记录论文信息
+        for i, paper in enumerate(papers, 1):
+            job.log(f"📄 **{i}. {paper.title}** — {', '.join(paper.authors)}")
+        
+    except Exception as e:
+        job.step(1, f'❌ 步骤1: 搜索失败 - {str(e)}', "error-step")
+        return None
+    
+    # 步骤2: 下载论文
+    job.step(2, '📥 步骤2: 下载论文中...')
+    
+    try:
+        downloaded = crawler.download_papers(papers, papers_dir)
+        
+        if not downloaded:
+            job.step(2, '❌ 步骤2: 论文下载失败', "error-step")
             return None
         
-        # 步骤2: 下载论文
-        step2_placeholder = st.empty()
-        step2_placeholder.markdown('<div class="progress-step">📥 步骤2: 下载论文中...</div>', unsafe_allow_html=True)
+        job.step(2, f'✅ 步骤2: 成功下载 {len(downloaded)} 篇论文', "success-step")
         
-        try:
-            downloaded = crawler.download_papers(papers)
-            
-            if not downloaded:
-                step2_placeholder.markdown('<div class="progress-step error-step">❌ 步骤2: 论文下载失败</div>', unsafe_allow_html=True)
-                return None
-            
-            step2_placeholder.markdown(f'<div class="progress-step success-step">✅ 步骤2: 成功下载 {len(downloaded)} 篇论文</div>', unsafe_allow_html=True)
-            
-        except Exception as e:
-            step2_placeholder.markdown(f'<div class="progress-step error-step">❌ 步骤2: 下载失败 - {str(e)}</div>', unsafe_allow_html=True)
+    except Exception as e:
+        job.step(2, f'❌ 步骤2: 下载失败 - {str(e)}', "error-step")
+        return None
+    
+    # 步骤3: 解析论文
+    job.step(3, '📖 步骤3: 解析论文中...')
+    
+    try:
+        # 未开启中间结果持久化时，解析结果只保留在内存中交给步骤4
+        persist_dir = extracted_dir if settings.PERSIST_INTERMEDIATE else None
+        # 在Streamlit的后台线程中运行，不在多线程的服务进程中创建进程池
+        parsed_papers = parser.batch_parse_papers(papers_dir, persist_dir, max_workers=1)
+        
+        if not parsed_papers:
+            job.step(3, '❌ 步骤3: 论文解析失败', "error-step")
             return None
         
-        # 步骤3: 解析论文
-        step3_placeholder = st.empty()
-        step3_placeholder.markdown('<div class="progress-step">📖 步骤3: 解析论文中...</div>', unsafe_allow_html=True)
+        job.step(3, f'✅ 步骤3: 成功解析 {len(parsed_papers)} 篇论文', "success-step")
         
-        try:
-            parser = PDFParser()
-            parsed_papers = parser.batch_parse_papers(papers_dir, extracted_dir)
+        # (标题, 全文) 列表直接交给步骤4，开启 PERSIST_INTERMEDIATE 时JSON文件只作为留档
+        parsed_list = []
+        
+        for i, paper in enumerate(parsed_papers):
+            full_text = paper.full_text
+            # 标题在解析阶段已确定，此处只需兜底
+            paper_title = paper.title or f"Paper_{i+1}"
             
-            if not parsed_papers:
-                step3_placeholder.markdown('<div class="progress-step error-step">❌ 步骤3: 论文解析失败</div>', unsafe_allow_html=True)
-                return None
+            parsed_list.append((paper_title, full_text))
             
-            step3_placeholder.markdown(f'<div class="progress-step success-step">✅ 步骤3: 成功解析 {len(parsed_papers)} 篇论文</div>', unsafe_allow_html=True)
+            if not settings.PERSIST_INTERMEDIATE:
+                continue
             
-            # 获取已下载的PDF文件列表，用于提取标题
-            pdf_files = list(papers_dir.glob("*.pdf"))
+            parsed_json = {
+                "title": paper_title,
+                "full_text": full_text
+            }
             
-            # 保存解析结果为JSON
-            for i, paper in enumerate(parsed_papers):
-                full_text = getattr(paper, "full_text", "")
-                if not full_text and hasattr(paper, "sections"):
-                    full_text = "\n".join(getattr(section, "text", "") for section in paper.sections)
-                
-                # 获取标题，如果没有标题则从PDF文件名中提取
-                paper_title = getattr(paper, "title", "")
-                if not paper_title and i < len(pdf_files):
-                    # 从PDF文件名提取标题
-                    pdf_file = pdf_files[i]
-                    file_name = pdf_file.name.replace(".pdf", "")
-                    # 清理文件名，去掉ArXiv ID部分
-                    parts = file_name.split("_", 1)
-                    if len(parts) > 1:
-                        paper_title = parts[1].replace("_", " ")
-                    else:
-                        paper_title = file_name.replace("_", " ")
-                
-                # 如果仍然没有标题，尝试从内容开头提取
-                if not paper_title or paper_title.startswith("Paper_"):
-                    lines = full_text.split('\n')[:15]  # 检查前15行
-                    for line in lines:
-                        line = line.strip()
-                        if line and len(line) > 10 and len(line) < 200:
-                            # 可能是标题，排除常见的章节标题
-                            line_lower = line.lower()
-                            if not any(keyword in line_lower for keyword in 
-                                     ['abstract', 'introduction', 'method', 'result', 'conclusion', 
-                                      'references', 'appendix', 'acknowledgment', 'figure', 'table']):
-                                paper_title = line
-                                break
-                
-                # 最后的备选方案
-                if not paper_title:
-                    paper_title = f"Paper_{i+1}"
-                
-                parsed_json = {
-                    "title": paper_title,
-                    "full_text": full_text
-                }
-                
-                # 使用安全的文件名
-                safe_title = "".join(c for c in paper_title if c.isalnum() or c in (' ', '-', '_')).strip()[:50]
-                if not safe_title:
-                    safe_title = f"paper_{i+1}"
-                
-                output_json = extracted_dir / f"{safe_title.replace(' ', '_')}_parsed.json"
-                with open(output_json, "w", encoding="utf-8") as f:
-                    json.dump(parsed_json, f, ensure_ascii=False, indent=2)
-                    
-                st.write(f"💾 保存解析结果: {paper_title}")
+            # 使用安全的文件名
+            safe_title = _UNSAFE_FILENAME_CHARS.sub('', paper_title).strip()[:50]
+            if not safe_title:
+                safe_title = f"paper_{i+1}"
             
-        except Exception as e:
-            step3_placeholder.markdown(f'<div class="progress-step error-step">❌ 步骤3: 解析失败 - {str(e)}</div>', unsafe_allow_html=True)
+            output_json = extracted_dir / f"{safe_title.replace(' ', '_')}_parsed.json"
+            with open(output_json, "wb") as f:
+                f.write(orjson.dumps(parsed_json, option=orjson.OPT_INDENT_2))
+                
+            job.log(f"💾 保存解析结果: {paper_title}")
+        
+    except Exception as e:
+        job.step(3, f'❌ 步骤3: 解析失败 - {str(e)}', "error-step")
+        return None
+    
+    # 步骤4: 提取创新点
+    job.step(4, '💡 步骤4: 提取创新点中...')
+    
+    try:
+        # 多篇论文合并为一次AI请求，各批次之间相互独立，并发提交以缩短总耗时
+        batch_size = max(1, settings.EXTRACTION_BATCH_SIZE)
+        batches = [parsed_list[i:i + batch_size] for i in range(0, len(parsed_list), batch_size)]
+        
+        results = [None] * len(batches)
+        max_workers = max(1, min(settings.MAX_CONCURRENT_REQUESTS, len(batches)))
+        job.log(f"🔍 共 {len(parsed_list)} 篇论文待提取创新点")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(extract_batch_innovations, batch, extractor, innovations_dir): index
+                for index, batch in enumerate(batches)
+            }
+            for i, future in enumerate(as_completed(futures), 1):
+                messages, batch_results = future.result()
+                job.log(f"📄 完成批次 {i}/{len(batches)}")
+                for message in messages:
+                    job.log(message)
+                results[futures[future]] = batch_results
+        
+        extracted_innovations = [
+            extracted
+            for batch_results in results
+            for extracted in batch_results
+            if extracted
+        ]
+        
+        if not extracted_innovations:
+            job.step(4, '❌ 步骤4: 创新点提取失败 - 没有成功提取任何创新点', "error-step")
             return None
         
-        # 步骤4: 提取创新点
-        step4_placeholder = st.empty()
-        step4_placeholder.markdown('<div class="progress-step">💡 步骤4: 提取创新点中...</div>', unsafe_allow_html=True)
+        total_innovations = sum(len(ext.innovations) for ext in extracted_innovations)
+        job.step(4, f'✅ 步骤4: 成功提取 {total_innovations} 个创新点', "success-step")
         
-        try:
-            extractor = InnovationExtractor()
-            
-            json_files = list(extracted_dir.glob("*_parsed.json"))
-            extracted_innovations = []
-            
-            st.write(f"🔍 找到 {len(json_files)} 个解析文件")
-            
-            for i, json_file in enumerate(json_files, 1):
-                try:
-                    st.write(f"📄 处理文件 {i}/{len(json_files)}: {json_file.name}")
-                    
-                    with open(json_file, "r", encoding="utf-8") as f:
-                        paper_data = json.load(f)
-                    
-                    paper_title = paper_data.get("title", "")
-                    paper_content = paper_data.get("full_text", "")
-                    
-                    if not paper_title:
-                        st.write(f"⚠️ 文件 {json_file.name} 缺少标题，跳过")
-                        continue
-                        
-                    if not paper_content:
-                        st.write(f"⚠️ 文件 {json_file.name} 缺少内容，跳过")
-                        continue
-                    
-                    st.write(f"🤖 正在提取创新点: {paper_title[:50]}...")
-                    
-                    extracted = extractor.extract_innovations(paper_content, paper_title)
-                    if extracted:
-                        extracted_innovations.append(extracted)
-                        
-                        # 保存创新点
-                        output_file = innovations_dir / f"{paper_title.replace(' ', '_')[:50]}_innovations.json"
-                        extractor.save_innovations(extracted, output_file)
-                        
-                        st.write(f"✅ 成功提取 {len(extracted.innovations)} 个创新点")
-                    else:
-                        st.write(f"❌ 提取失败: {paper_title[:50]}")
-                        
-                except Exception as file_error:
-                    st.write(f"❌ 处理文件 {json_file.name} 时出错: {str(file_error)}")
-                    continue
-            
-            if not extracted_innovations:
-                step4_placeholder.markdown('<div class="progress-step error-step">❌ 步骤4: 创新点提取失败 - 没有成功提取任何创新点</div>', unsafe_allow_html=True)
-                return None
-            
-            total_innovations = sum(len(ext.innovations) for ext in extracted_innovations)
-            step4_placeholder.markdown(f'<div class="progress-step success-step">✅ 步骤4: 成功提取 {total_innovations} 个创新点</div>', unsafe_allow_html=True)
-            
-        except Exception as e:
-            step4_placeholder.markdown(f'<div class="progress-step error-step">❌ 步骤4: 提取失败 - {str(e)}</div>', unsafe_allow_html=True)
+    except Exception as e:
+        job.step(4, f'❌ 步骤4: 提取失败 - {str(e)}', "error-step")
+        return None
+    
+    # 步骤5: 生成新想法
+    job.step(5, '🚀 步骤5: 生成新想法中...')
+    
+    try:
+        result = generator.generate_ideas_from_innovations(extracted_innovations, search_query)
+        
+        if not result:
+            job.step(5, '❌ 步骤5: 想法生成失败', "error-step")
             return None
         
-        # 步骤5: 生成新想法
-        step5_placeholder = st.empty()
-        step5_placeholder.markdown('<div class="progress-step">🚀 步骤5: 生成新想法中...</div>', unsafe_allow_html=True)
+        job.step(5, f'✅ 步骤5: 成功生成 {len(result.generated_ideas)} 个新想法', "success-step")
         
-        try:
-            generator = IdeaGenerator()
-            
-            result = generator.generate_ideas_from_innovations(extracted_innovations, search_query)
-            
-            if not result:
-                step5_placeholder.markdown('<div class="progress-step error-step">❌ 步骤5: 想法生成失败</div>', unsafe_allow_html=True)
-                return None
-            
-            step5_placeholder.markdown(f'<div class="progress-step success-step">✅ 步骤5: 成功生成 {len(result.generated_ideas)} 个新想法</div>', unsafe_allow_html=True)
+        return {
+            'search_query': search_query,
+            'papers': papers,
+            'extracted_innovations': extracted_innovations,
+            'generated_ideas': result,
+            'session_dir': session_dir
+        }
+        
+    except Exception as e:
+        job.step(5, f'❌ 步骤5: 生成失败 - {str(e)}', "error-step")
+        return None
+
+
+def extract_batch_innovations(papers: List[Tuple[str, str]], extractor: InnovationExtractor,
+                              innovations_dir: Path) -> Tuple[List[str], List[Optional[ExtractedInnovations]]]:
+    """
+    从一批已解析论文中提取创新点，整批论文合并为一次AI请求
+    
+    在工作线程中运行，不能直接调用 st.*，进度信息以消息列表返回由主线程输出
+    
+    Args:
+        papers: (论文标题, 论文内容) 列表
+        extractor: 创新点提取器
+        innovations_dir: 创新点输出目录
+        
+    Returns:
+        (进度消息列表, 与 papers 一一对应的提取结果列表)
+    """
+    messages = []
+    results: List[Optional[ExtractedInnovations]] = [None] * len(papers)
+    valid_indices = []
+    
+    for index, (paper_title, paper_content) in enumerate(papers):
+        if not paper_title:
+            messages.append(f"⚠️ 第 {index + 1} 篇论文缺少标题，跳过")
+            continue
             
-            return {
-                'search_query': search_query,
-                'papers': papers,
-                'extracted_innovations': extracted_innovations,
-                'generated_ideas': result,
-                'session_dir': session_dir
-            }
+        if not paper_content:
+            messages.append(f"⚠️ {paper_title[:50]} 缺少内容，跳过")
+            continue
+        
+        messages.append(f"🤖 提取创新点: {paper_title[:50]}...")
+        valid_indices.append(index)
+    
+    try:
+        extracted_list = extractor.extract_innovations_batch([papers[index] for index in valid_indices])
+    except Exception as batch_error:
+        messages.append(f"❌ 批量提取时出错: {str(batch_error)}")
+        return messages, results
+    
+    for index, extracted in zip(valid_indices, extracted_list):
+        paper_title = papers[index][0]
+        results[index] = extracted
+        if extracted:
+            # 保存创新点
+            output_file = innovations_dir / f"{paper_title.replace(' ', '_')[:50]}_innovations.json"
+            extractor.save_innovations(extracted, output_file)
             
-        except Exception as e:
-            step5_placeholder.markdown(f'<div class="progress-step error-step">❌ 步骤5: 生成失败 - {str(e)}</div>', unsafe_allow_html=True)
-            return None
+            messages.append(f"✅ {paper_title[:50]}: 成功提取 {len(extracted.innovations)} 个创新点")
+        else:
+            messages.append(f"❌ 提取失败: {paper_title[:50]}")
+    
+    return messages, results
 
 
 def display_innovation_results(result: Dict):
@@ -433,37 +620,17 @@ def display_innovation_results(result: Dict):
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>📄 {len(papers)}</h3>
-            <p>论文数量</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(_METRIC_CARD_TPL.format(icon="📄", value=len(papers), label="论文数量"), unsafe_allow_html=True)
     
     with col2:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>💡 {total_innovations}</h3>
-            <p>创新点数量</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(_METRIC_CARD_TPL.format(icon="💡", value=total_innovations, label="创新点数量"), unsafe_allow_html=True)
     
     with col3:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>🚀 {len(generated_ideas.generated_ideas)}</h3>
-            <p>新想法数量</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(_METRIC_CARD_TPL.format(icon="🚀", value=len(generated_ideas.generated_ideas), label="新想法数量"), unsafe_allow_html=True)
     
     with col4:
         avg_novelty = sum(idea.novelty_score for idea in generated_ideas.generated_ideas) / len(generated_ideas.generated_ideas)
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>⭐ {avg_novelty:.2f}</h3>
-            <p>平均新颖性</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(_METRIC_CARD_TPL.format(icon="⭐", value=f"{avg_novelty:.2f}", label="平均新颖性"), unsafe_allow_html=True)
     
     # 创新点展示
     st.subheader("💡 提取的创新点")
@@ -473,56 +640,32 @@ def display_innovation_results(result: Dict):
             st.markdown(f"**📝 论文摘要:** {extracted.summary}")
             st.markdown(f"**🔢 创新点数量:** {len(extracted.innovations)}")
             
-            for j, innovation in enumerate(extracted.innovations, 1):
-                st.markdown(f"""
-                <div class="innovation-card">
-                    <h4>💡 创新点 {j}: {innovation.title}</h4>
-                    <p><strong>📋 描述:</strong> {innovation.description}</p>
-                    <p><strong>🏷️ 类别:</strong> {innovation.category}</p>
-                    <p><strong>🎯 影响:</strong> {innovation.impact}</p>
-                    <p><strong>🔬 方法:</strong> {innovation.methodology}</p>
-                    <div style="display: flex; gap: 20px; margin-top: 10px;">
-                        <span><strong>⭐ 新颖性:</strong> {innovation.novelty_score:.2f}</span>
-                        <span><strong>🎯 置信度:</strong> {innovation.confidence:.2f}</span>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+            # 同一篇论文的所有创新点卡片合并为一次渲染
+            cards = ''.join(
+                _INNOVATION_CARD_TPL.format(index=j, inv=innovation)
+                for j, innovation in enumerate(extracted.innovations, 1)
+            )
+            if cards:
+                st.markdown(cards, unsafe_allow_html=True)
     
     # 生成的新想法
     st.subheader("🚀 生成的新想法")
     
-    for i, idea in enumerate(generated_ideas.generated_ideas, 1):
-        st.markdown(f"""
-        <div class="idea-card">
-            <h4>🚀 想法 {i}: {idea.title}</h4>
-            <p><strong>📋 描述:</strong> {idea.description}</p>
-            <p><strong>🔗 来源创新点:</strong> {', '.join(idea.source_innovations)}</p>
-            <p><strong>🔄 组合类型:</strong> {idea.combination_type}</p>
-            <p><strong>🛤️ 实施路径:</strong> {idea.implementation_path}</p>
-            
-            <div style="display: flex; gap: 20px; margin: 10px 0;">
-                <span><strong>⭐ 新颖性:</strong> {idea.novelty_score:.2f}</span>
-                <span><strong>🎯 可行性:</strong> {idea.feasibility_score:.2f}</span>
-                <span><strong>🚀 影响潜力:</strong> {idea.impact_potential:.2f}</span>
-            </div>
-            
-            <div style="margin-top: 15px;">
-                <strong>🔬 研究方向:</strong>
-                <ul>
-                    {''.join(f'<li>{direction}</li>' for direction in idea.research_directions)}
-                </ul>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+    idea_cards = ''.join(
+        _IDEA_CARD_TPL.format(
+            index=i,
+            sources=', '.join(idea.source_innovations),
+            directions=''.join(f'<li>{direction}</li>' for direction in idea.research_directions),
+            idea=idea
+        )
+        for i, idea in enumerate(generated_ideas.generated_ideas, 1)
+    )
+    if idea_cards:
+        st.markdown(idea_cards, unsafe_allow_html=True)
     
     # 分析总结
     st.subheader("📊 分析总结")
-    st.markdown(f"""
-    <div class="innovation-card">
-        <h4>🎯 总体分析</h4>
-        <p>{generated_ideas.analysis_summary}</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_SUMMARY_CARD_TPL.format(summary=generated_ideas.analysis_summary), unsafe_allow_html=True)
 
 
 def save_session_results(result: Dict, session_dir: Path, search_query: str):
@@ -534,7 +677,7 @@ def save_session_results(result: Dict, session_dir: Path, search_query: str):
         # 保存完整结果
         output_file = results_dir / f"complete_results_{search_query.replace(' ', '_')}.json"
         
-        # 转换为可序列化的格式
+        # 创新点和想法本身是dataclass，由orjson在C层直接序列化，不再逐字段复制成字典
         serializable_result = {
             "search_query": search_query,
             "timestamp": datetime.now().isoformat(),
@@ -552,43 +695,27 @@ def save_session_results(result: Dict, session_dir: Path, search_query: str):
                 {
                     "paper_title": ext.paper_title,
                     "summary": ext.summary,
-                    "innovations": [
-                        {
-                            "title": inn.title,
-                            "description": inn.description,
-                            "category": inn.category,
-                            "impact": inn.impact,
-                            "methodology": inn.methodology,
-                            "novelty_score": inn.novelty_score,
-                            "confidence": inn.confidence
-                        }
-                        for inn in ext.innovations
-                    ]
+                    "innovations": ext.innovations
                 }
                 for ext in result['extracted_innovations']
             ],
             "generated_ideas": {
                 "topic": result['generated_ideas'].topic,
                 "analysis_summary": result['generated_ideas'].analysis_summary,
-                "ideas": [
-                    {
-                        "title": idea.title,
-                        "description": idea.description,
-                        "source_innovations": idea.source_innovations,
-                        "combination_type": idea.combination_type,
-                        "feasibility_score": idea.feasibility_score,
-                        "novelty_score": idea.novelty_score,
-                        "impact_potential": idea.impact_potential,
-                        "implementation_path": idea.implementation_path,
-                        "research_directions": idea.research_directions
-                    }
-                    for idea in result['generated_ideas'].generated_ideas
-                ]
+                "ideas": result['generated_ideas'].generated_ideas
             }
         }
         
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(serializable_result, f, ensure_ascii=False, indent=2)
+        output_file.write_bytes(
+            orjson.dumps(serializable_result, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        )
+        
+        # 历史记录侧边栏只需要查询词，单独写一个小文件，避免每次重绘都解析完整结果
+        (results_dir / HISTORY_META_FILE).write_bytes(orjson.dumps({
+            "search_query": search_query,
+            "timestamp": serializable_result["timestamp"],
+            "result_file": output_file.name
+        }))
         
         st.success(f"✅ 结果已保存到: {output_file}")
         
@@ -596,6 +723,43 @@ def save_session_results(result: Dict, session_dir: Path, search_query: str):
         st.error(f"❌ 保存结果失败: {e}")
 
 
+@st.cache_data(ttl=60)
+def _load_history_summary(results_dir: str, mtime: float) -> Optional[Dict]:
+    """
+    读取一次会话的历史摘要
+    
+    结果按 (目录, 修改时间) 缓存，目录内容变化后自动重新读取
+    
+    Args:
+        results_dir: 会话结果目录
+        mtime: 结果目录的修改时间，仅作为缓存键
+        
+    Returns:
+        {"query": 查询词, "result_file": 完整结果文件路径}，没有结果时返回None
+    """
+    results_path = Path(results_dir)
+    try:
+        meta_file = results_path / HISTORY_META_FILE
+        if meta_file.exists():
+            meta = orjson.loads(meta_file.read_bytes())
+            return {
+                "query": meta.get("search_query", "未知"),
+                "result_file": str(results_path / meta["result_file"])
+            }
+        
+        # 旧会话没有摘要文件，回退到读取完整结果
+        result_files = list(results_path.glob("complete_results_*.json"))
+        if not result_files:
+            return None
+        data = orjson.loads(result_files[0].read_bytes())
+        return {
+            "query": data.get("search_query", "未知"),
+            "result_file": str(result_files[0])
+        }
+    except Exception:
+        return None
+
+
 def show_history_sidebar():
     """显示历史记录侧边栏"""
     data_dir = settings.DATA_DIR
@@ -618,21 +782,14 @@ def show_history_sidebar():
     for session_dir in session_dirs[:5]:  # 显示最近5次
         results_dir = session_dir / "results"
         if results_dir.exists():
-            result_files = list(results_dir.glob("complete_results_*.json"))
-            if result_files:
-                try:
-                    with open(result_files[0], 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    
-                    timestamp = session_dir.name.replace("session_", "")
-                    query = data.get("search_query", "未知")
-                    
-                    if st.button(f"📅 {timestamp[:8]}\n🔍 {query[:20]}...", key=f"history_{timestamp}"):
-                        st.session_state.selected_history = result_files[0]
-                        st.rerun()
-                        
-                except Exception:
-                    continue
+            summary = _load_history_summary(str(results_dir), results_dir.stat().st_mtime)
+            if summary:
+                timestamp = session_dir.name.replace("session_", "")
+                query = summary["query"]
+                
+                if st.button(f"📅 {timestamp[:8]}\n🔍 {query[:20]}...", key=f"history_{timestamp}"):
+                    st.session_state.selected_history = Path(summary["result_file"])
+                    st.rerun()
 
 
 def show_analysis_page():
@@ -648,9 +805,13 @@ def show_analysis_page():
 
 def display_historical_results(result_file: Path):
     """显示历史结果"""
+    # pandas/plotly 只有查看历史结果时才用到，延迟导入以加快应用首次加载
+    import pandas as pd
+    import plotly.express as px
+    
     try:
-        with open(result_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(result_file, 'rb') as f:
+            data = orjson.loads(f.read())
         
         st.success(f"已加载结果: {result_file.name}")
         
@@ -671,8 +832,15 @@ def display_historical_results(result_file: Path):
         
         ideas = data.get('generated_ideas', {}).get('ideas', [])
         if ideas:
-            # 创建数据框
-            df = pd.DataFrame(ideas)
+            # 只取图表用到的列，按列构建数据框，避免逐行推断类型
+            chart_columns = [
+                column for column in IDEA_CHART_COLUMNS
+                if any(column in idea for idea in ideas)
+            ]
+            df = pd.DataFrame({
+                column: [idea.get(column) for idea in ideas]
+                for column in chart_columns
+            })
             
             # 散点图
             fig1 = px.scatter(
@@ -1,6 +1,289 @@
 import os
+import time
+import socket
+import asyncio
+import weakref
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict
+from functools import wraps
+from importlib.util import find_spec
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+import orjson
 from config.settings import settings
 
+# httpx 在首次创建客户端时才导入，只构造生成器/提取器而不调用API时不加载
+if TYPE_CHECKING:
+    import httpx
+
+# 进程内复用的HTTP客户端，保持长连接，避免每次调用重新建立TCP+TLS连接；
+# 按 (API密钥, 接口地址) 区分，配置变化后自动使用新的客户端
+_clients: Dict[Tuple[Optional[str], str], "httpx.Client"] = {}
+# 异步客户端绑定创建时的事件循环，按事件循环分别缓存；循环被回收后对应客户端随之释放
+_async_clients = weakref.WeakKeyDictionary()
+_client_lock = threading.Lock()
+
+
+def _client_options() -> dict:
+    """
+    构建HTTP客户端参数
+    
+    Returns:
+        httpx客户端参数
+    """
+    import httpx
+    
+    return {
+        "base_url": settings.DEEPSEEK_BASE_URL,
+        "headers": {"Authorization": f"Bearer {settings.DEEPSEEK_API_KEY}"},
+        # 安装了h2时启用HTTP/2，并发请求可复用同一连接
+        "http2": find_spec("h2") is not None,
+        "timeout": settings.REQUEST_TIMEOUT,
+        "limits": httpx.Limits(
+            max_connections=settings.MAX_CONCURRENT_REQUESTS,
+            max_keepalive_connections=settings.MAX_CONCURRENT_REQUESTS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        ),
+    }
+
+
+def _client_key() -> Tuple[Optional[str], str]:
+    """当前配置对应的客户端缓存键"""
+    return settings.DEEPSEEK_API_KEY, settings.DEEPSEEK_BASE_URL
+
+
+def _get_client() -> "httpx.Client":
+    """获取共享的同步HTTP客户端（线程安全）"""
+    key = _client_key()
+    client = _clients.get(key)
+    if client is None:
+        import httpx
+        
+        with _client_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = httpx.Client(**_client_options())
+    return client
+
+
+def _get_async_client() -> "httpx.AsyncClient":
+    """获取当前事件循环共享的异步HTTP客户端"""
+    key = _client_key()
+    loop_clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    client = loop_clients.get(key)
+    if client is None:
+        import httpx
+        
+        client = loop_clients[key] = httpx.AsyncClient(**_client_options())
+    return client
+
+
+async def aclose_clients():
+    """关闭当前事件循环的异步HTTP客户端，在即将结束的事件循环（如 asyncio.run）中调用"""
+    loop_clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in loop_clients.values():
+        await client.aclose()
+
+
+def _build_payload(prompt, **kwargs) -> dict:
+    """
+    构建chat completions请求体
+    
+    Args:
+        prompt: 提示词
+        **kwargs: 其他参数，json_mode=True 时要求模型只输出JSON对象；
+            system 为固定不变的系统消息，放在用户消息之前；model 覆盖默认模型
+    
+    Returns:
+        请求体
+    """
+    messages = [{"role": "user", "content": prompt}]
+    if kwargs.get('system'):
+        # 系统消息在前，多次请求共享相同前缀，命中API的前缀缓存
+        messages.insert(0, {"role": "system", "content": kwargs['system']})
+    
+    payload = {
+        "model": kwargs.get('model', settings.DEEPSEEK_MODEL),
+        "messages": messages,
+        "max_tokens": kwargs.get('max_tokens', settings.DEEPSEEK_MAX_TOKENS),
+        "temperature": kwargs.get('temperature', settings.DEEPSEEK_TEMPERATURE),
+        "stream": False
+    }
+    if kwargs.get('json_mode'):
+        # JSON输出模式：服务端保证返回合法JSON，提示词中需包含"JSON"字样及格式示例
+        payload["response_format"] = {"type": "json_object"}
+    return payload
+
+
+def _parse_response(response: "httpx.Response"):
+    """
+    从响应中取出模型回复内容
+    
+    Args:
+        response: HTTP响应
+    
+    Returns:
+        AI响应内容
+    """
+    response.raise_for_status()
+    return response.json()["choices"][0]["message"]["content"]
+
+
+def content_key(*parts: str) -> str:
+    """
+    计算若干文本内容的哈希，用作结果缓存的键
+    
+    Args:
+        *parts: 参与计算的文本
+    
+    Returns:
+        十六进制哈希值
+    """
+    return hashlib.blake2b("\0".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ResultCache:
+    """进程内的有界LRU结果缓存（线程安全），相同输入直接复用已解析的结果，不再请求API"""
+    
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str):
+        """读取缓存，未命中时返回None"""
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+    
+    def put(self, key: str, value):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        if value is None:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+def _cache_path(prompt, **kwargs):
+    """
+    计算提示词对应的缓存文件路径
+    
+    Args:
+        prompt: 提示词
+        **kwargs: 其他参数
+    
+    Returns:
+        缓存文件路径
+    """
+    payload = _build_payload(prompt, **kwargs)
+    raw = f"{payload['model']}|{payload['temperature']}|{payload['max_tokens']}|{prompt}"
+    if "response_format" in payload:
+        raw = f"json|{raw}"
+    if kwargs.get('system'):
+        raw = f"{kwargs['system']}|{raw}"
+    key = hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+    return settings.DATA_DIR / "llm_cache" / key[:2] / key
+
+
+def _read_cache(prompt, **kwargs):
+    """读取缓存的AI响应，未开启缓存、未命中、已过期或无法读取时返回None"""
+    if not settings.LLM_CACHE:
+        return None
+    path = _cache_path(prompt, **kwargs)
+    try:
+        # 超过有效期的缓存视为未命中，重新请求后由 _write_cache 覆盖
+        if settings.LLM_CACHE_TTL and time.time() - path.stat().st_mtime > settings.LLM_CACHE_TTL:
+            return None
+        return path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+    except (OSError, UnicodeDecodeError) as e:
+        # 缓存只是加速手段，读取失败时照常请求API
+        from loguru import logger
+        
+        logger.warning(f"读取AI响应缓存失败 {path}: {e}")
+        return None
+
+
+def _write_cache(result, prompt, **kwargs):
+    """写入AI响应缓存，先写临时文件再替换，避免并发读到半截内容；写入失败不影响已取得的响应"""
+    if not settings.LLM_CACHE or not result:
+        return
+    path = _cache_path(prompt, **kwargs)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_text(result, encoding="utf-8")
+        os.replace(tmp_path, path)
+    except OSError as e:
+        from loguru import logger
+        
+        logger.warning(f"写入AI响应缓存失败 {path}: {e}")
+        try:
+            tmp_path.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+def _disk_cached(func):
+    """
+    按 (模型, 温度, 最大token数, 提示词) 的哈希在磁盘上缓存AI响应
+    
+    Args:
+        func: 同步或异步的API调用函数
+    
+    Returns:
+        带缓存的函数
+    """
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(prompt, **kwargs):
+            cached = _read_cache(prompt, **kwargs)
+            if cached is not None:
+                return cached
+            result = await func(prompt, **kwargs)
+            _write_cache(result, prompt, **kwargs)
+            return result
+        return async_wrapper
+    
+    @wraps(func)
+    def wrapper(prompt, **kwargs):
+        cached = _read_cache(prompt, **kwargs)
+        if cached is not None:
+            return cached
+        result = func(prompt, **kwargs)
+        _write_cache(result, prompt, **kwargs)
+        return result
+    return wrapper
+
+
+def api_reachable(timeout: float = 0.2) -> bool:
+    """
+    探测API地址能否建立TCP连接，离线环境下据此跳过真实的API调用
+    
+    Args:
+        timeout: 连接超时秒数
+    
+    Returns:
+        是否可连接
+    """
+    url = urlsplit(settings.DEEPSEEK_BASE_URL)
+    port = url.port or (443 if url.scheme == "https" else 80)
+    try:
+        with socket.create_connection((url.hostname, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
 def call_ai(prompt, **kwargs):
     """
     调用DeepSeek AI API
@@ -8,13 +291,14 @@ def call_ai(prompt, **kwargs):
     Args:
         prompt: 提示词
         **kwargs: 其他参数
-        
+    
     Returns:
         AI响应内容
     """
     return call_deepseek(prompt, **kwargs)
 
 
+@_disk_cached
 def call_deepseek(prompt, **kwargs):
     """
     调用DeepSeek API
@@ -22,36 +306,82 @@ def call_deepseek(prompt, **kwargs):
     Args:
         prompt: 提示词
         **kwargs: 其他参数
-        
+    
     Returns:
         AI响应内容
     """
-    from openai import OpenAI
     from loguru import logger
     
     try:
-        logger.info(f"调用DeepSeek API，模型: {settings.DEEPSEEK_MODEL}")
-        
-        client = OpenAI(
-            api_key=settings.DEEPSEEK_API_KEY,
-            base_url="https://api.deepseek.com/v1"
-        )
-
-        response = client.chat.completions.create(
-            model=settings.DEEPSEEK_MODEL,
-            messages=[
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=kwargs.get('max_tokens', settings.DEEPSEEK_MAX_TOKENS),
-            temperature=kwargs.get('temperature', settings.DEEPSEEK_TEMPERATURE),
-            stream=False
-        )
-        
-        result = response.choices[0].message.content
+        logger.info(f"调用DeepSeek API，模型: {kwargs.get('model', settings.DEEPSEEK_MODEL)}")
+        
+        response = _get_client().post("/chat/completions", json=_build_payload(prompt, **kwargs))
+        
+        result = _parse_response(response)
         logger.info(f"API调用成功，返回内容长度: {len(result) if result else 0}")
         return result
+    
+    except Exception as e:
+        logger.error(f"DeepSeek API调用失败: {e}")
+        logger.error(f"错误类型: {type(e).__name__}")
+        raise e
+
+
+def stream_deepseek(prompt, **kwargs) -> Iterator[str]:
+    """
+    以流式方式调用DeepSeek API，逐段返回模型生成的内容（不经过磁盘缓存）
+    
+    Args:
+        prompt: 提示词
+        **kwargs: 其他参数
+    
+    Yields:
+        AI响应内容片段
+    """
+    from loguru import logger
+    
+    logger.info(f"流式调用DeepSeek API，模型: {kwargs.get('model', settings.DEEPSEEK_MODEL)}")
+    
+    payload = _build_payload(prompt, **kwargs)
+    payload["stream"] = True
+    with _get_client().stream("POST", "/chat/completions", json=payload) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            # 服务端推送事件：每个数据行为 "data: {...}"，以 "data: [DONE]" 结束
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            content = orjson.loads(data)["choices"][0]["delta"].get("content")
+            if content:
+                yield content
+
+
+@_disk_cached
+async def acall_deepseek(prompt, **kwargs):
+    """
+    异步调用DeepSeek API
+    
+    Args:
+        prompt: 提示词
+        **kwargs: 其他参数
+    
+    Returns:
+        AI响应内容
+    """
+    from loguru import logger
+    
+    try:
+        logger.info(f"异步调用DeepSeek API，模型: {kwargs.get('model', settings.DEEPSEEK_MODEL)}")
         
+        response = await _get_async_client().post("/chat/completions", json=_build_payload(prompt, **kwargs))
+        
+        result = _parse_response(response)
+        logger.info(f"API调用成功，返回内容长度: {len(result) if result else 0}")
+        return result
+    
     except Exception as e:
         logger.error(f"DeepSeek API调用失败: {e}")
         logger.error(f"错误类型: {type(e).__name__}")
-        raise e 
\ No newline at end of file
+        raise e
@@ -2,48 +2,56 @@
 日志系统模块
 """
 import sys
-from pathlib import Path
-from loguru import logger
-from config.settings import settings
+
+# 是否已完成日志处理器配置
+_initialized = False
 
 
 def setup_logger():
     """设置日志系统"""
+    global _initialized
+    
+    # 导入时不加载loguru与配置，首次使用时才初始化
+    from loguru import logger
+    from config.settings import settings
+    
+    # 各处理器共用的配置只读取一次
+    log_format = settings.LOG_FORMAT
+    log_level = settings.LOG_LEVEL
+    logs_dir = settings.LOGS_DIR
+    
     # 移除默认的日志处理器
     logger.remove()
     
     # 添加控制台日志处理器
     logger.add(
         sys.stdout,
-        format=settings.LOG_FORMAT,
-        level=settings.LOG_LEVEL,
+        format=log_format,
+        level=log_level,
         colorize=True
     )
     
-    # 添加文件日志处理器
-    log_file = settings.LOGS_DIR / "idea_creator.log"
+    # 添加文件日志处理器（enqueue=True：写盘与压缩交给后台线程，调用方只需入队）；
+    # 错误日志不再单独写一份，按级别在此文件中检索即可
+    log_file = logs_dir / "idea_creator.log"
     logger.add(
         log_file,
-        format=settings.LOG_FORMAT,
-        level=settings.LOG_LEVEL,
-        rotation="10 MB",
+        format=log_format,
+        level=log_level,
+        rotation="50 MB",
         retention="30 days",
-        compression="zip"
-    )
-    
-    # 添加错误日志文件
-    error_log_file = settings.LOGS_DIR / "errors.log"
-    logger.add(
-        error_log_file,
-        format=settings.LOG_FORMAT,
-        level="ERROR",
-        rotation="5 MB",
-        retention="60 days",
-        compression="zip"
+        compression="zip",
+        enqueue=True
     )
     
+    _initialized = True
     return logger
 
 
-# 初始化日志系统
-setup_logger() 
\ No newline at end of file
+def get_logger():
+    """获取日志器，首次调用时初始化日志系统"""
+    if not _initialized:
+        return setup_logger()
+    
+    from loguru import logger
+    return logger
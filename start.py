@@ -3,24 +3,72 @@
 智能论文创新点生成器 - 启动脚本
 """
 import os
+import re
 import sys
 import subprocess
+import importlib.metadata
 from pathlib import Path
 
+# 命令行各功能所需的核心依赖
+CORE_PACKAGES = ['arxiv', 'requests', 'httpx', 'orjson', 'pydantic', 'loguru']
 
-def check_dependencies():
-    """检查依赖是否安装"""
-    required_packages = [
-        'streamlit', 'pandas', 'plotly', 'arxiv', 'requests',
-        'pdfplumber', 'PyPDF2', 'openai', 'anthropic', 'loguru'
-    ]
+# 仅Web界面需要的依赖，启动Web界面前再检查
+UI_PACKAGES = ['streamlit', 'pandas', 'plotly']
+
+# PDF解析库只在解析时才需要，默认启动不检查，可用 --check-pdf 提前检查
+PDF_PACKAGES = ['pypdfium2', 'pdfplumber', 'PyPDF2']
+
+# 启动Web界面的命令行（其余菜单操作已在当前进程内直接调用）
+STREAMLIT_CMD = [
+    sys.executable, "-m", "streamlit", "run",
+    "src/ui/streamlit_app.py",
+    "--server.port", "8501",
+    "--server.address", "localhost"
+]
+
+# 已安装的发行包名（规范化后），同一进程内只扫描一次
+_installed_distributions = None
+
+# 环境检查结果缓存，菜单反复进入“检查环境”时不重复检查
+_check_results = {}
+_dirs_created = False
+
+
+def _normalize_name(name):
+    """按PEP 503规范化包名，忽略大小写及 - _ . 的差异"""
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+def _is_installed(package):
+    """根据已安装发行包的元数据判断包是否已安装，不导入也不逐个查找模块"""
+    global _installed_distributions
+    if _installed_distributions is None:
+        _installed_distributions = {
+            _normalize_name(dist.metadata['Name'])
+            for dist in importlib.metadata.distributions()
+            if dist.metadata['Name']
+        }
+    return _normalize_name(package) in _installed_distributions
+
+
+def check_dependencies(check_pdf=False, check_ui=False):
+    """
+    检查依赖是否安装
+    
+    Args:
+        check_pdf: 是否同时检查PDF解析库
+        check_ui: 是否同时检查Web界面依赖
+    """
+    required_packages = list(CORE_PACKAGES)
+    if check_ui:
+        required_packages += UI_PACKAGES
+    if check_pdf:
+        required_packages += PDF_PACKAGES
     
-    missing_packages = []
-    for package in required_packages:
-        try:
-            __import__(package)
-        except ImportError:
-            missing_packages.append(package)
+    cache_key = ('missing_packages', check_pdf, check_ui)
+    if cache_key not in _check_results:
+        _check_results[cache_key] = [p for p in required_packages if not _is_installed(p)]
+    missing_packages = _check_results[cache_key]
     
     if missing_packages:
         print(f"❌ 缺少依赖包: {', '.join(missing_packages)}")
@@ -33,6 +81,11 @@ def check_dependencies():
 
 def check_config():
     """检查配置文件"""
+    # .env存在后缓存结果，菜单中再次检查时不再访问文件系统
+    if _check_results.get('config_ok'):
+        print("✅ 配置文件存在")
+        return True
+    
     env_file = Path(".env")
     if not env_file.exists():
         print("❌ 未找到.env配置文件")
@@ -45,19 +98,25 @@ DEEPSEEK_API_KEY=your_deepseek_api_key_here
 DEBUG=True
 LOG_LEVEL=INFO
 """
-        with open(env_file, 'w') as f:
-            f.write(env_content)
+        env_file.write_bytes(env_content.encode())
         
+        # 只提示一次，不阻塞后续操作
         print("✅ 已创建.env配置文件")
         print("⚠️  请编辑.env文件，添加你的API密钥")
-        return False
+    else:
+        print("✅ 配置文件存在")
     
-    print("✅ 配置文件存在")
+    _check_results['config_ok'] = True
     return True
 
 
 def create_directories():
     """创建必要的目录"""
+    global _dirs_created
+    if _dirs_created:
+        print("✅ 目录结构已创建")
+        return
+    
     directories = [
         "data",
         "data/papers",
@@ -67,9 +126,15 @@ def create_directories():
         "logs"
     ]
     
-    for directory in directories:
-        Path(directory).mkdir(parents=True, exist_ok=True)
+    # 只创建叶子目录，父目录由 parents=True 一并创建
+    paths = {Path(d) for d in directories}
+    leaves = [p for p in paths if not any(p in other.parents for other in paths)]
+    for directory in leaves:
+        # 已存在的目录只需一次stat，不再发起mkdir系统调用
+        if not directory.is_dir():
+            directory.mkdir(parents=True, exist_ok=True)
     
+    _dirs_created = True
     print("✅ 目录结构已创建")
 
 
@@ -77,23 +142,18 @@ def start_web_interface():
     """启动Web界面"""
     print("🚀 启动Web界面...")
     
+    # 只在启动Web界面时检查界面依赖，无需另起解释器导入streamlit
+    missing_packages = [p for p in UI_PACKAGES if not _is_installed(p)]
+    if missing_packages:
+        print(f"❌ Web界面缺少依赖包: {', '.join(missing_packages)}")
+        print("请运行: pip install -r requirements.txt")
+        return
+    
     try:
-        # 检查streamlit是否可用
-        subprocess.run([sys.executable, "-c", "import streamlit"], check=True)
-        
         # 启动streamlit应用
-        cmd = [
-            sys.executable, "-m", "streamlit", "run",
-            "src/ui/streamlit_app.py",
-            "--server.port", "8501",
-            "--server.address", "localhost"
-        ]
-        
         print("🌐 Web界面将在 http://localhost:8501 启动")
-        subprocess.run(cmd)
+        subprocess.run(STREAMLIT_CMD)
         
-    except subprocess.CalledProcessError:
-        print("❌ Streamlit未安装，请运行: pip install streamlit")
     except FileNotFoundError:
         print("❌ 未找到streamlit应用文件")
     except KeyboardInterrupt:
@@ -139,12 +199,23 @@ def show_menu():
             print("❌ 无效选择，请重试")
 
 
+def _load_main():
+    """在当前进程内加载main.py的命令函数，避免每次操作都启动新的解释器"""
+    import main
+    from src.utils.logger import get_logger
+    
+    get_logger()
+    return main
+
+
 def run_example():
     """运行完整示例"""
     print("🔬 运行完整示例...")
     try:
-        subprocess.run([sys.executable, "example.py"], check=True)
-    except subprocess.CalledProcessError as e:
+        from example import example_workflow
+        _load_main()
+        example_workflow()
+    except Exception as e:
         print(f"❌ 运行示例失败: {e}")
     except KeyboardInterrupt:
         print("\n⏹️  示例已停止")
@@ -162,32 +233,34 @@ def search_papers():
     
     download = input("是否下载论文? (y/n, 默认n): ").strip().lower() == 'y'
     
-    cmd = [sys.executable, "main.py", "search", "-q", query, "-m", str(max_results)]
-    if download:
-        cmd.append("-d")
-    
     try:
-        subprocess.run(cmd, check=True)
-    except subprocess.CalledProcessError as e:
+        _load_main().cmd_search(query, max_results, download=download)
+    except Exception as e:
         print(f"❌ 搜索失败: {e}")
+    except KeyboardInterrupt:
+        print("\n⏹️  搜索已停止")
 
 
 def parse_papers():
     """解析论文"""
     print("📖 开始解析论文...")
     try:
-        subprocess.run([sys.executable, "main.py", "parse"], check=True)
-    except subprocess.CalledProcessError as e:
+        _load_main().cmd_parse()
+    except Exception as e:
         print(f"❌ 解析失败: {e}")
+    except KeyboardInterrupt:
+        print("\n⏹️  解析已停止")
 
 
 def extract_innovations():
     """提取创新点"""
     print("💡 开始提取创新点...")
     try:
-        subprocess.run([sys.executable, "main.py", "extract"], check=True)
-    except subprocess.CalledProcessError as e:
+        _load_main().cmd_extract()
+    except Exception as e:
         print(f"❌ 提取失败: {e}")
+    except KeyboardInterrupt:
+        print("\n⏹️  提取已停止")
 
 
 def generate_ideas():
@@ -198,9 +271,11 @@ def generate_ideas():
         return
     
     try:
-        subprocess.run([sys.executable, "main.py", "generate", "-t", topic], check=True)
-    except subprocess.CalledProcessError as e:
+        _load_main().cmd_generate(topic)
+    except Exception as e:
         print(f"❌ 生成失败: {e}")
+    except KeyboardInterrupt:
+        print("\n⏹️  生成已停止")
 
 
 def check_environment():
@@ -211,8 +286,8 @@ def check_environment():
     python_version = sys.version_info
     print(f"Python版本: {python_version.major}.{python_version.minor}.{python_version.micro}")
     
-    # 检查依赖
-    deps_ok = check_dependencies()
+    # 检查依赖（手动检查环境时一并检查PDF解析库与Web界面依赖）
+    deps_ok = check_dependencies(check_pdf=True, check_ui=True)
     
     # 检查配置
     config_ok = check_config()
@@ -232,7 +307,7 @@ def main():
     print("基于ArXiv论文分析，提取创新点并生成新的研究方向")
     
     # 检查环境
-    if not check_dependencies():
+    if not check_dependencies(check_pdf='--check-pdf' in sys.argv[1:]):
         return
     
     # 创建目录
@@ -7,15 +7,38 @@ import os
 sys.path.append(os.path.dirname(__file__))
 
 from config.settings import settings
-from src.utils.ai_client import call_ai
-from loguru import logger
+from src.utils.ai_client import call_ai, api_reachable
+from src.utils.logger import get_logger
+
+logger = get_logger()
+
+# 离线时跳过真实API调用，避免每个测试都等待HTTP超时
+ONLINE = api_reachable()
+
+# 模拟论文内容
+TEST_PAPER = """
+    Title: A Novel Approach to Machine Learning Optimization
+    
+    Abstract: This paper presents a new optimization algorithm that combines gradient descent with evolutionary strategies to achieve faster convergence in neural network training.
+    
+    Introduction: Traditional optimization methods often struggle with local minima...
+    
+    Method: We propose a hybrid approach that uses genetic algorithms to escape local minima while maintaining the efficiency of gradient-based methods...
+    
+    Results: Our method achieves 30% faster convergence compared to Adam optimizer on benchmark datasets...
+    
+    Conclusion: The proposed method shows significant improvements in both speed and accuracy...
+    """
 
 def test_api_connection():
     """测试API连接"""
     print("🔍 测试API连接...")
+    if not ONLINE:
+        print("⏭️  skipped (offline)")
+        return False
     # print(f"API密钥: {settings.DEEPSEEK_API_KEY[:10]}...")
     print(f"模型: {settings.DEEPSEEK_MODEL}")
-    print(f"基础URL: https://api.deepseek.com/v1")
+    print(f"基础URL: {settings.DEEPSEEK_BASE_URL}")
     
     try:
         # 简单的测试提示
@@ -40,27 +63,15 @@ def test_api_connection():
 def test_innovation_extraction():
     """测试创新点提取"""
     print("\n🧪 测试创新点提取...")
-    
-    # 模拟论文内容
-    test_paper = """
-    Title: A Novel Approach to Machine Learning Optimization
-    
-    Abstract: This paper presents a new optimization algorithm that combines gradient descent with evolutionary strategies to achieve faster convergence in neural network training.
-    
-    Introduction: Traditional optimization methods often struggle with local minima...
-    
-    Method: We propose a hybrid approach that uses genetic algorithms to escape local minima while maintaining the efficiency of gradient-based methods...
-    
-    Results: Our method achieves 30% faster convergence compared to Adam optimizer on benchmark datasets...
-    
-    Conclusion: The proposed method shows significant improvements in both speed and accuracy...
-    """
+    if not ONLINE:
+        print("⏭️  skipped (offline)")
+        return False
     
     try:
         from src.extractor.innovation_extractor import InnovationExtractor
         
         extractor = InnovationExtractor()
-        result = extractor.extract_innovations(test_paper, "A Novel Approach to Machine Learning Optimization")
+        result = extractor.extract_innovations(TEST_PAPER, "A Novel Approach to Machine Learning Optimization")
         
         if result:
             print("✅ 创新点提取成功！")
@@ -81,6 +92,10 @@ def main():
     """主函数"""
     print("🚀 开始API测试...")
     
+    if not ONLINE:
+        print("⏭️  无法连接API，跳过所有测试 (offline)")
+        return
+    
     # 测试基本API连接
     api_ok = test_api_connection()
     
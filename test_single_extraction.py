@@ -8,22 +8,14 @@ sys.path.append(os.path.dirname(__file__))
 
 from config.settings import settings
 from src.extractor.innovation_extractor import InnovationExtractor
+from src.utils.ai_client import api_reachable
 from src.utils.logger import setup_logger
 
-def main():
-    """主函数"""
-    # 设置日志
-    setup_logger()
-    
-    print("🔍 测试单个论文创新点提取...")
-    print(f"API密钥配置: {'✅' if settings.DEEPSEEK_API_KEY else '❌'}")
-    
-    if not settings.DEEPSEEK_API_KEY:
-        print("❌ 请先配置DEEPSEEK_API_KEY")
-        return
-    
-    # 测试论文内容
-    test_paper_content = """
+# 离线时跳过真实API调用，避免等待HTTP超时
+ONLINE = api_reachable()
+
+# 测试论文内容
+TEST_PAPER_CONTENT = """
     Title: Attention Is All You Need
     
     Abstract: The dominant sequence transduction models are based on complex recurrent or convolutional neural networks that include an encoder and a decoder. The best performing models also connect the encoder and decoder through an attention mechanism. We propose a new simple network architecture, the Transformer, based solely on attention mechanisms, dispensing with recurrence and convolutions entirely.
@@ -36,19 +28,36 @@ def main():
     
     Conclusion: We presented the Transformer, the first sequence transduction model based entirely on attention, replacing the recurrent layers most commonly used in encoder-decoder architectures with multi-headed self-attention. The Transformer can be trained significantly more quickly than architectures based on recurrent or convolutional layers.
     """
+
+TEST_PAPER_TITLE = "Attention Is All You Need"
+
+
+def main():
+    """主函数"""
+    # 设置日志
+    setup_logger()
+    
+    print("🔍 测试单个论文创新点提取...")
+    print(f"API密钥配置: {'✅' if settings.DEEPSEEK_API_KEY else '❌'}")
     
-    test_paper_title = "Attention Is All You Need"
+    if not settings.DEEPSEEK_API_KEY:
+        print("❌ 请先配置DEEPSEEK_API_KEY")
+        return
+    
+    if not ONLINE:
+        print("⏭️  skipped (offline)")
+        return
     
     try:
-        print(f"\n📄 测试论文: {test_paper_title}")
-        print(f"📝 论文内容长度: {len(test_paper_content)} 字符")
+        print(f"\n📄 测试论文: {TEST_PAPER_TITLE}")
+        print(f"📝 论文内容长度: {len(TEST_PAPER_CONTENT)} 字符")
         
         # 创建提取器
         extractor = InnovationExtractor()
         
         # 提取创新点
         print("\n🤖 开始提取创新点...")
-        result = extractor.extract_innovations(test_paper_content, test_paper_title)
+        result = extractor.extract_innovations(TEST_PAPER_CONTENT, TEST_PAPER_TITLE)
         
         if result:
             print("✅ 创新点提取成功！")
@@ -0,0 +1,149 @@
+"""
+想法生成模块测试
+"""
+import asyncio
+import io
+import httpx
+import orjson
+import pytest
+from contextlib import nullcontext
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+from src.extractor.innovation_extractor import InnovationPoint, ExtractedInnovations
+from src.utils import ai_client
+from src.generator.idea_generator import IdeaGenerator, IdeaGenerationResult, AI_PROMPT_MAX_INNOVATIONS
+
+
+AI_RESPONSE = '''
+{
+    "generated_ideas": [
+        {"title": "AI Idea", "novelty_score": 0.9, "feasibility_score": 0.9}
+    ]
+}
+'''
+
+
+class TestIdeaGenerator:
+    """想法生成器测试类"""
+
+    def setup_method(self):
+        """测试前设置"""
+        self.generator = IdeaGenerator()
+        self.innovations_list = [
+            ExtractedInnovations(
+                paper_title=f"Paper {p}",
+                paper_id="",
+                innovations=[
+                    InnovationPoint(title=f"Innovation {p}-{i}", category=f"Category {i % 2}")
+                    for i in range(15)
+                ],
+                summary="",
+                extraction_metadata={}
+            )
+            for p in range(2)
+        ]
+
+    @patch('src.generator.idea_generator.settings')
+    def test_generate_ideas_requests_chunks_concurrently(self, mock_settings):
+        """测试超出单次请求上限的创新点分组并发请求，同步接口返回合并后的结果"""
+        mock_settings.DEEPSEEK_API_KEY = "test_key"
+        requests = []
+
+        def handler(request):
+            requests.append(orjson.loads(request.content))
+            return httpx.Response(200, json={"choices": [{"message": {"content": AI_RESPONSE}}]})
+
+        # 在HTTP层模拟API，请求体构建、响应解析与JSON校验都走真实代码
+        client_options = ai_client._client_options
+        with patch.object(ai_client, "_client_options",
+                          lambda: {**client_options(), "transport": httpx.MockTransport(handler)}), \
+                patch.object(ai_client.settings, "LLM_CACHE", False):
+            result = self.generator.generate_ideas_from_innovations(self.innovations_list, "test topic")
+
+        # 30个创新点按每组20个分为2次请求
+        assert AI_PROMPT_MAX_INNOVATIONS == 20
+        assert len(requests) == 2
+        assert all(body["response_format"] == {"type": "json_object"} for body in requests)
+        # 固定说明作为系统消息在前，两次请求的系统消息完全相同，只有用户消息不同
+        assert [m["role"] for m in requests[0]["messages"]] == ["system", "user"]
+        assert requests[0]["messages"][0] == requests[1]["messages"][0]
+        assert "generated_ideas" in requests[0]["messages"][0]["content"]
+        assert "test topic" in requests[0]["messages"][1]["content"]
+        assert result.generation_metadata["total_innovations"] == 30
+        assert result.generated_ideas[0].title == "AI Idea"
+        assert len(result.generated_ideas) == 20
+
+    @patch('src.generator.idea_generator.acall_deepseek', new_callable=AsyncMock)
+    @patch('src.generator.idea_generator.settings')
+    def test_agenerate_ideas_ai_failure(self, mock_settings, mock_acall):
+        """测试AI请求失败时仍返回组合想法"""
+        mock_settings.DEEPSEEK_API_KEY = "test_key"
+        mock_acall.side_effect = Exception("API error")
+
+        result = asyncio.run(
+            self.generator.agenerate_ideas_from_innovations(self.innovations_list[:1], "test topic")
+        )
+
+        assert result is not None
+        assert all(idea.combination_type != "ai_generated" for idea in result.generated_ideas)
+
+    def test_create_combination_idea(self):
+        """测试组合想法评分"""
+        innovations = [
+            InnovationPoint(title="A", novelty_score=0.5, confidence=0.6),
+            InnovationPoint(title="B", novelty_score=0.7, confidence=0.8)
+        ]
+
+        idea = self.generator._create_combination_idea(innovations, "intra_category")
+
+        assert idea.title == "Combined: A + B"
+        assert idea.source_innovations == ["A", "B"]
+        assert idea.feasibility_score == pytest.approx(0.56)
+        assert idea.novelty_score == pytest.approx(0.72)
+        assert idea.impact_potential == pytest.approx(0.42)
+        assert self.generator._create_combination_idea(innovations[:1], "intra_category") is None
+
+    def test_parse_ai_generation_result(self):
+        """测试解析纯JSON与前后带说明文字的AI结果"""
+        wrapped = f"以下是生成的想法：\n{AI_RESPONSE}\n以上。"
+
+        for text in (AI_RESPONSE, wrapped, AI_RESPONSE + "\n以上。"):
+            ideas = self.generator._parse_ai_generation_result(text)
+            assert [idea.title for idea in ideas] == ["AI Idea"]
+
+        assert self.generator._parse_ai_generation_result("没有JSON") == []
+        assert self.generator._parse_ai_generation_result("{invalid json}") == []
+
+    def test_generate_ideas_no_innovations(self):
+        """测试没有创新点时返回None"""
+        empty = ExtractedInnovations("Paper", "", [], "", {})
+
+        assert self.generator.generate_ideas_from_innovations([empty], "test topic") is None
+
+    @patch('src.generator.idea_generator.settings')
+    def test_save_generation_result(self, mock_settings):
+        """测试保存生成结果为JSON"""
+        mock_settings.DEEPSEEK_API_KEY = ""
+        result = self.generator.generate_ideas_from_innovations(self.innovations_list[:1], "测试主题")
+        buf = io.BytesIO()
+
+        self.generator.save_generation_result(result, Path("result.json"), opener=lambda p, m: nullcontext(buf))
+
+        data = orjson.loads(buf.getvalue())
+        assert data["topic"] == "测试主题"
+        assert "测试主题".encode("utf-8") in buf.getvalue()
+        assert len(data["generated_ideas"]) == len(result.generated_ideas)
+        assert set(data["generated_ideas"][0]) == {
+            "title", "description", "source_innovations", "combination_type",
+            "feasibility_score", "novelty_score", "impact_potential",
+            "implementation_path", "research_directions"
+        }
+
+    def test_save_generation_result_to_file(self, tmp_path):
+        """测试默认写入磁盘文件"""
+        result = IdeaGenerationResult("测试主题", [], "", {})
+        output_path = tmp_path / "result.json"
+
+        self.generator.save_generation_result(result, output_path)
+
+        assert orjson.loads(output_path.read_bytes())["topic"] == "测试主题"
@@ -1,12 +1,21 @@
 """
 创新点提取模块测试
 """
+import os
+import time
 import pytest
 import json
+import asyncio
+import httpx
+from dataclasses import asdict
 from pathlib import Path
-from unittest.mock import Mock, patch, mock_open
+from unittest.mock import AsyncMock, Mock, patch
+from src.utils import ai_client
+from src.utils.ai_client import ResultCache
+from src.extractor import innovation_extractor
 from src.extractor.innovation_extractor import (
-    InnovationExtractor, InnovationPoint, ExtractedInnovations
+    InnovationExtractor, InnovationPoint, ExtractedInnovations, _truncate_content,
+    EXTRACTION_PROMPT_PREFIX, MAX_CONTENT_TOKENS, ASCII_CHAR_TOKENS, WIDE_CHAR_TOKENS
 )
 
 
@@ -65,6 +74,30 @@ class TestInnovationExtractor:
         assert result.innovations[0].novelty_score == 0.9
         mock_call_ai.assert_called_once()
     
+    @pytest.mark.parametrize("confidence, escalated", [(0.4, True), (0.9, False)])
+    @patch('src.extractor.innovation_extractor.settings')
+    @patch('src.extractor.innovation_extractor.call_ai')
+    def test_escalation_on_low_confidence(self, mock_call_ai, mock_settings, confidence, escalated):
+        """测试默认模型置信度低于阈值时升级模型重新提取"""
+        mock_settings.DEEPSEEK_API_KEY = "test_key"
+        mock_settings.DEEPSEEK_ESCALATION_MODEL = "deepseek-reasoner"
+        mock_settings.ESCALATION_CONFIDENCE_THRESHOLD = 0.7
+        mock_call_ai.side_effect = [
+            '{"innovations": [{"title": "Idea A"}], "extraction_metadata": {"confidence_overall": %s}}' % confidence,
+            '{"innovations": [{"title": "Idea B"}], "extraction_metadata": {"confidence_overall": 0.9}}',
+        ]
+
+        result = self.extractor.extract_innovations(self.test_paper_content, self.test_paper_title)
+
+        # 第一次请求总是使用默认模型
+        assert "model" not in mock_call_ai.call_args_list[0].kwargs
+        if escalated:
+            assert mock_call_ai.call_args_list[1].kwargs["model"] == "deepseek-reasoner"
+            assert result.innovations[0].title == "Idea B"
+        else:
+            assert mock_call_ai.call_count == 1
+            assert result.innovations[0].title == "Idea A"
+
     @patch('src.extractor.innovation_extractor.call_ai')
     def test_extract_innovations_failure(self, mock_call_ai):
         """测试提取失败"""
@@ -87,7 +120,312 @@ class TestInnovationExtractor:
         
         assert result is None
     
-    def test_save_and_load_innovations(self):
+    @patch('src.extractor.innovation_extractor.settings')
+    @patch('src.extractor.innovation_extractor.call_ai')
+    def test_extract_innovations_batch(self, mock_call_ai, mock_settings):
+        """测试多篇论文合并为一次请求提取，缺失的论文单独提取"""
+        mock_settings.DEEPSEEK_API_KEY = "test_key"
+        mock_settings.DEEPSEEK_MAX_TOKENS = 4000
+        batch_response = '''
+        {
+            "papers": [
+                {
+                    "paper_index": 1,
+                    "innovations": [{"title": "Idea A", "novelty_score": 0.7}],
+                    "summary": "Summary A"
+                }
+            ]
+        }
+        '''
+        single_response = '{"innovations": [{"title": "Idea B"}], "summary": "Summary B"}'
+        mock_call_ai.side_effect = [batch_response, single_response]
+
+        results = self.extractor.extract_innovations_batch([
+            ("Paper A", "Content A"),
+            ("Paper B", "Content B"),
+        ])
+
+        assert [r.paper_title for r in results] == ["Paper A", "Paper B"]
+        assert results[0].innovations[0].title == "Idea A"
+        assert results[1].innovations[0].title == "Idea B"
+        assert mock_call_ai.call_count == 2
+        assert "Content A" in mock_call_ai.call_args_list[0].args[0]
+        assert "Content B" in mock_call_ai.call_args_list[0].args[0]
+
+    @patch('src.extractor.innovation_extractor.settings')
+    @patch('src.extractor.innovation_extractor.acall_deepseek', new_callable=AsyncMock)
+    def test_batch_extract_innovations_concurrent(self, mock_acall, mock_settings, tmp_path):
+        """测试批量提取的请求并发发出且不超过并发上限，结果与保存顺序和输入一致"""
+        mock_settings.DEEPSEEK_API_KEY = "test_key"
+        mock_settings.MAX_CONCURRENT_REQUESTS = 2
+        in_flight = []
+        max_in_flight = 0
+
+        async def fake_acall(prompt, **kwargs):
+            nonlocal max_in_flight
+            in_flight.append(prompt)
+            max_in_flight = max(max_in_flight, len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(prompt)
+            # 按提示中的论文内容返回对应结果
+            return '{"innovations": [{"title": "Idea %s"}], "summary": ""}' % prompt.rstrip()[-1]
+
+        mock_acall.side_effect = fake_acall
+        papers = [Mock(title=f"Paper {i}", full_text=f"Content {i}") for i in range(3)]
+
+        results = self.extractor.batch_extract_innovations(papers, tmp_path)
+
+        assert [r.innovations[0].title for r in results] == ["Idea 0", "Idea 1", "Idea 2"]
+        assert mock_acall.await_count == 3
+        assert max_in_flight == 2
+        assert len(list(tmp_path.glob("*_innovations.json"))) == 3
+
+    @patch('src.extractor.innovation_extractor.settings')
+    @patch('src.extractor.innovation_extractor.acall_deepseek', new_callable=AsyncMock)
+    def test_batch_extract_resume(self, mock_acall, mock_settings, tmp_path):
+        """测试从断点文件恢复时跳过已完成的论文，新结果追加到断点文件"""
+        mock_settings.DEEPSEEK_API_KEY = "test_key"
+        mock_settings.MAX_CONCURRENT_REQUESTS = 8
+        mock_acall.return_value = '{"innovations": [{"title": "Idea 1"}], "summary": ""}'
+        checkpoint = tmp_path / "checkpoint.jsonl"
+        done = ExtractedInnovations("Paper 0", "", [InnovationPoint(title="Idea 0")], "", {})
+        # 末尾模拟中断时写了一半的行
+        checkpoint.write_bytes(json.dumps(asdict(done)).encode() + b'\n{"paper_title": "Pap')
+        papers = [Mock(title=f"Paper {i}", full_text=f"Content {i}") for i in range(2)]
+
+        results = self.extractor.batch_extract_innovations(papers, tmp_path / "out", resume_from=checkpoint)
+
+        assert mock_acall.await_count == 1
+        assert "Content 1" in mock_acall.await_args.args[0]
+        assert [r.innovations[0].title for r in results] == ["Idea 0", "Idea 1"]
+        assert set(self.extractor._read_checkpoint(checkpoint)) == {"Paper 0", "Paper 1"}
+
+    @patch('src.extractor.innovation_extractor.settings')
+    @patch('src.extractor.innovation_extractor.acall_deepseek', new_callable=AsyncMock)
+    def test_batch_dedup(self, mock_acall, mock_settings, tmp_path):
+        """测试内容相同的论文只请求一次，结果按各自标题保存"""
+        mock_settings.DEEPSEEK_API_KEY = "test_key"
+        mock_settings.MAX_CONCURRENT_REQUESTS = 8
+        mock_acall.return_value = '{"innovations": [{"title": "Idea A"}], "summary": ""}'
+        papers = [Mock(title="Paper A", full_text="Content A"), Mock(title="Paper A copy", full_text="Content A")]
+
+        results = self.extractor.batch_extract_innovations(papers, tmp_path)
+
+        assert mock_acall.await_count == 1
+        assert [r.paper_title for r in results] == ["Paper A", "Paper A copy"]
+        assert results[1].innovations[0].title == "Idea A"
+        assert len(list(tmp_path.glob("*_innovations.json"))) == 2
+
+    @patch('src.extractor.innovation_extractor.settings')
+    @patch('src.extractor.innovation_extractor.call_ai')
+    def test_extract_innovations_uses_result_cache(self, mock_call_ai, mock_settings):
+        """测试相同论文重复提取时复用缓存结果，批量提取只发送未命中的论文"""
+        mock_settings.DEEPSEEK_API_KEY = "test_key"
+        mock_call_ai.side_effect = [
+            '{"innovations": [{"title": "Idea A"}], "summary": "Summary A"}',
+            '{"innovations": [{"title": "Idea B"}], "summary": "Summary B"}',
+        ]
+
+        first = self.extractor.extract_innovations("Content A", "Paper A")
+        second = self.extractor.extract_innovations("Content A", "Paper A")
+        results = self.extractor.extract_innovations_batch([
+            ("Paper A", "Content A"),
+            ("Paper B", "Content B"),
+        ])
+
+        assert second is first
+        assert results[0] is first
+        assert results[1].innovations[0].title == "Idea B"
+        assert mock_call_ai.call_count == 2
+        assert "Content A" not in mock_call_ai.call_args_list[1].args[0]
+
+    def test_extract_innovations_disk_cache(self, tmp_path):
+        """测试开启磁盘缓存后相同请求不再访问API，缓存过期后重新请求"""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            content = '{"innovations": [{"title": "Idea A"}], "summary": "Summary A"}'
+            return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+        client_options = ai_client._client_options
+        with patch.object(ai_client, "_clients", {}), \
+                patch.object(ai_client, "_client_options",
+                             lambda: {**client_options(), "transport": httpx.MockTransport(handler)}), \
+                patch.multiple(ai_client.settings, DEEPSEEK_API_KEY="test_key", LLM_CACHE=True,
+                               LLM_CACHE_TTL=60, DATA_DIR=tmp_path):
+            # 每次使用新的提取器，绕过进程内的结果缓存，只验证磁盘缓存
+            first = InnovationExtractor().extract_innovations("Content A", "Paper A")
+            second = InnovationExtractor().extract_innovations("Content A", "Paper A")
+            assert len(requests) == 1
+
+            # 缓存文件超过有效期后重新请求
+            cache_file, = (tmp_path / "llm_cache").glob("*/*")
+            expired = time.time() - 120
+            os.utime(cache_file, (expired, expired))
+            InnovationExtractor().extract_innovations("Content A", "Paper A")
+            # 多个提取器实例共用同一个HTTP客户端及其连接池
+            assert len(ai_client._clients) == 1
+
+        assert first.innovations[0].title == second.innovations[0].title == "Idea A"
+        assert len(requests) == 2
+
+    def test_disk_cache_failures_do_not_break_calls(self, tmp_path):
+        """测试缓存无法读写时仍返回API响应"""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json={"choices": [{"message": {"content": "live"}}]})
+
+        client_options = ai_client._client_options
+        with patch.object(ai_client, "_clients", {}), \
+                patch.object(ai_client, "_client_options",
+                             lambda: {**client_options(), "transport": httpx.MockTransport(handler)}), \
+                patch.multiple(ai_client.settings, DEEPSEEK_API_KEY="test_key", LLM_CACHE=True,
+                               LLM_CACHE_TTL=0, DATA_DIR=tmp_path):
+            # 无法解码的缓存文件视为未命中
+            cache_file = ai_client._cache_path("prompt")
+            cache_file.parent.mkdir(parents=True)
+            cache_file.write_bytes(b"\xff\xfe")
+            assert ai_client.call_ai("prompt") == "live"
+
+            # 缓存目录不可写（DATA_DIR 是普通文件）时仍返回已取得的响应
+            not_a_dir = tmp_path / "file"
+            not_a_dir.write_text("")
+            with patch.object(ai_client.settings, "DATA_DIR", not_a_dir):
+                assert ai_client.call_ai("prompt") == "live"
+
+        assert len(requests) == 2
+        assert not list(tmp_path.rglob("*.tmp"))
+
+    def test_parse_extraction_result_stream(self):
+        """测试流式解析时创新点在完整输出后立即返回"""
+        response = (
+            '{"innovations": [{"title": "Idea A", "novelty_score": 0.7}, '
+            '{"title": "Idea B", "novelty_score": 0.8}], "summary": "Summary"}'
+        )
+        chunks = [response[i:i + 7] for i in range(0, len(response), 7)]
+        consumed = []
+
+        def feed():
+            for chunk in chunks:
+                consumed.append(chunk)
+                yield chunk
+
+        stream = self.extractor._parse_extraction_result_stream(feed(), "Paper")
+        first = next(stream)
+        assert first.title == "Idea A"
+        assert len(consumed) < len(chunks)
+
+        rest = []
+        with pytest.raises(StopIteration) as stop:
+            while True:
+                rest.append(next(stream))
+        assert [idea.title for idea in rest] == ["Idea B"]
+        assert rest[0].novelty_score == 0.8
+        assert stop.value.value.summary == "Summary"
+
+    def test_parse_extraction_result_stream_skips_invalid_item(self):
+        """测试流式解析跳过不合法的创新点，字符串中的括号和转义不影响切分"""
+        response = (
+            '{"innovations": [{"title": "Idea \\"A\\" {x}]", "extraction_metadata": {"k": [1]}}, '
+            '{"title": "Bad", "novelty_score": "high"}, '
+            '{"title": "Idea C"}], "summary": "Summary", "extraction_metadata": {"confidence_overall": 0.9}}'
+        )
+
+        for size in (1, 5, len(response)):
+            stream = self.extractor._parse_extraction_result_stream(
+                (response[i:i + size] for i in range(0, len(response), size)), "Paper"
+            )
+            ideas = []
+            with pytest.raises(StopIteration) as stop:
+                while True:
+                    ideas.append(next(stream))
+
+            assert [idea.title for idea in ideas] == ['Idea "A" {x}]', "Idea C"]
+            assert stop.value.value.innovations == ideas
+            assert stop.value.value.summary == "Summary"
+            assert stop.value.value.extraction_metadata == {"confidence_overall": 0.9}
+
+    def test_extract_innovations_stream(self):
+        """测试通过流式API提取创新点，完整结果写入缓存"""
+        content = '{"innovations": [{"title": "Idea A"}, {"title": "Idea B"}], "summary": "S"}'
+        events = "".join(
+            f'data: {json.dumps({"choices": [{"delta": {"content": content[i:i + 10]}}]})}\n\n'
+            for i in range(0, len(content), 10)
+        ) + "data: [DONE]\n\n"
+        requests = []
+
+        def handler(request):
+            requests.append(json.loads(request.content))
+            return httpx.Response(200, text=events, headers={"content-type": "text/event-stream"})
+
+        client_options = ai_client._client_options
+        with patch.object(ai_client, "_clients", {}), \
+                patch.object(ai_client, "_client_options",
+                             lambda: {**client_options(), "transport": httpx.MockTransport(handler)}), \
+                patch.object(ai_client.settings, "DEEPSEEK_API_KEY", "test_key"):
+            ideas = list(self.extractor.extract_innovations_stream("Content A", "Paper A"))
+            cached = self.extractor.extract_innovations("Content A", "Paper A")
+
+        assert [idea.title for idea in ideas] == ["Idea A", "Idea B"]
+        assert requests[0]["stream"] is True
+        assert len(requests) == 1
+        assert cached.summary == "S"
+
+    def test_truncate_content_keeps_conclusion(self):
+        """测试裁剪内容时保留开头和结论，去掉参考文献"""
+        content = (
+            "Abstract\nintro " + "x" * 200 + "\nbody " + "y" * 500
+            + "\n5. Conclusion\nWe conclude.\nReferences\n[1] ref"
+        )
+
+        result = _truncate_content(content, max_chars=300)
+
+        assert len(result) <= 310
+        assert result.startswith("Abstract\nintro")
+        assert "5. Conclusion\nWe conclude." in result
+        assert "[1] ref" not in result
+        assert _truncate_content("short", max_chars=300) == "short"
+
+        # 参考文献中以 "conclusions" 开头的折行不能被当作结论标题
+        wrapped = (
+            "Abstract\nintro " + "x" * 200 + "\nbody " + "y" * 500
+            + "\n5. Conclusion\nReal conclusion.\nReferences\n[1] A. Author. Evaluating\n"
+            + "conclusions in NLP. ACL 2020.\n" + "[2] ref " * 100
+        )
+        result = _truncate_content(wrapped, max_chars=300)
+        assert "Real conclusion" in result
+        assert "ACL 2020" not in result
+
+    def test_truncate_content_token_budget(self):
+        """测试默认按token预算裁剪，中文论文保留的字符数约为英文的一半"""
+        english = _truncate_content("Abstract\n" + "x" * 20000)
+        chinese = _truncate_content("摘要\n" + "中" * 20000)
+
+        assert len(english) == MAX_CONTENT_TOKENS / ASCII_CHAR_TOKENS
+        assert len(chinese) == pytest.approx(MAX_CONTENT_TOKENS / WIDE_CHAR_TOKENS, abs=1)
+
+    def test_truncate_content_cached_across_prompts(self):
+        """测试批量提示与单篇提示裁剪同一篇论文时复用裁剪结果"""
+        content = "Abstract\n" + "x" * 20000 + "\n5. Conclusion\nDone."
+        truncate = innovation_extractor._truncate_long_content
+
+        with patch.object(innovation_extractor, "_TRUNCATE_CACHE", ResultCache(maxsize=32)) as cache, \
+                patch.object(innovation_extractor, "_truncate_long_content", wraps=truncate) as mock_truncate:
+            batch_prompt = self.extractor._build_batch_extraction_prompt([("A", content), ("B", "short")])
+            single_prompt = self.extractor._build_extraction_prompt(content, "A")
+
+            assert _truncate_content(content) in batch_prompt
+            assert _truncate_content(content) in single_prompt
+
+        # 只裁剪一次；缓存以内容哈希为键，只保存裁剪后的文本
+        assert mock_truncate.call_count == 1
+        assert list(cache._data.values()) == [_truncate_content(content)]
+        assert all(len(key) == 32 for key in cache._data)
+    
+    def test_save_and_load_innovations(self, tmp_path):
         """测试保存和加载创新点"""
         # 创建测试数据
         innovation = InnovationPoint(
@@ -109,7 +447,7 @@ class TestInnovationExtractor:
         )
         
         # 测试保存
-        test_path = Path("/tmp/test_innovations.json")
+        test_path = tmp_path / "test_innovations.json"
         self.extractor.save_innovations(extracted, test_path)
         
         # 验证文件存在
@@ -119,11 +457,26 @@ class TestInnovationExtractor:
         loaded = self.extractor.load_innovations(test_path)
         assert loaded is not None
         assert loaded.paper_title == "Test Paper"
+        assert loaded.paper_id == "test_id"
         assert len(loaded.innovations) == 1
-        assert loaded.innovations[0].title == "Test Innovation"
-        
-        # 清理测试文件
-        test_path.unlink()
+        assert loaded.innovations[0] == innovation
+        assert loaded.extraction_metadata == {"test": "metadata"}
+    
+    def test_save_extracted_innovations(self, tmp_path):
+        """测试保存提取的创新点"""
+        extracted = ExtractedInnovations(
+            paper_title="Test Paper",
+            paper_id="test_id",
+            innovations=[InnovationPoint(title="Idea A", novelty_score=0.7)],
+            summary="Summary",
+            extraction_metadata={"model_used": "deepseek-chat"}
+        )
+        output_path = tmp_path / "test_innovations.json"
+
+        self.extractor.save_extracted_innovations(extracted, output_path)
+
+        assert output_path.stat().st_size < 1024
+        assert json.loads(output_path.read_text(encoding="utf-8")) == asdict(extracted)
     
     def test_build_extraction_prompt(self):
         """测试构建提取提示"""
@@ -134,6 +487,9 @@ class TestInnovationExtractor:
         assert self.test_paper_title in prompt
         assert "innovations" in prompt
         assert "JSON" in prompt
+        # 固定前缀在前，论文信息在后
+        assert prompt.startswith(EXTRACTION_PROMPT_PREFIX)
+        assert prompt.index(self.test_paper_title) >= len(EXTRACTION_PROMPT_PREFIX)
     
     def test_parse_extraction_result_success(self):
         """测试解析提取结果成功"""
@@ -162,6 +518,14 @@ class TestInnovationExtractor:
         assert len(result.innovations) == 1
         assert result.innovations[0].title == "Test Innovation"
     
+    def test_parse_extraction_result_wrapped(self):
+        """测试解析前后带说明文字的结果"""
+        payload = '{"innovations": [{"title": "Idea A"}], "summary": "Summary"}'
+
+        for text in (payload, f"提取结果如下：\n{payload}\n以上。", payload + "\n以上。"):
+            result = self.extractor._parse_extraction_result(text, "Test Paper")
+            assert [i.title for i in result.innovations] == ["Idea A"]
+
     def test_parse_extraction_result_invalid_json(self):
         """测试解析无效JSON"""
         result_text = "This is not valid JSON"
@@ -189,6 +553,7 @@ class TestInnovationPoint:
         assert innovation.title == "Test Innovation"
         assert innovation.novelty_score == 0.8
         assert innovation.confidence == 0.9
+        assert not hasattr(innovation, '__dict__')
 
 
 class TestExtractedInnovations:
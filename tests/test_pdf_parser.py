@@ -1,11 +1,18 @@
 """
 PDF解析模块测试
 """
+import os
+import json
 import pytest
 from pathlib import Path
 from unittest.mock import Mock, patch, mock_open
 from src.parser.pdf_parser import PDFParser, PaperSection, ParsedPaper
 
+try:
+    import fitz
+except ImportError:
+    fitz = None
+
 
 class TestPDFParser:
     """PDF解析器测试类"""
@@ -35,6 +42,43 @@ class TestPDFParser:
         assert result == "Test page content\n"
         mock_pdfplumber.open.assert_called_once_with(self.test_pdf_path)
     
+    @patch.object(PDFParser, '_iter_pdfium_pages')
+    @patch('src.parser.pdf_parser.pdfplumber')
+    def test_extract_text_from_pdf_preferred_backend(self, mock_pdfplumber, mock_iter_pdfium):
+        """测试优先使用指定的解析库"""
+        mock_pdf = Mock()
+        mock_page = Mock()
+        mock_page.extract_text.return_value = "Test page content"
+        mock_pdf.pages = [mock_page]
+        mock_pdfplumber.open.return_value.__enter__.return_value = mock_pdf
+
+        parser = PDFParser(backend="pdfplumber")
+        result = parser.extract_text_from_pdf(self.test_pdf_path)
+
+        assert result == "Test page content\n"
+        mock_iter_pdfium.assert_not_called()
+
+    @patch.object(PDFParser, '_iter_pymupdf_pages', return_value=iter([]))
+    @patch.object(PDFParser, '_iter_pdfium_pages', return_value=iter([" \n"]))
+    @patch('src.parser.pdf_parser.pdfplumber')
+    def test_extract_text_from_pdf_empty_falls_back(self, mock_pdfplumber, mock_iter_pdfium, mock_iter_pymupdf):
+        """测试快速解析库未提取到文本时回退到pdfplumber"""
+        mock_pdf = Mock()
+        mock_page = Mock()
+        mock_page.extract_text.return_value = "Test page content"
+        mock_pdf.pages = [mock_page]
+        mock_pdfplumber.open.return_value.__enter__.return_value = mock_pdf
+
+        result = self.parser.extract_text_from_pdf(self.test_pdf_path)
+
+        assert result == "Test page content\n"
+        mock_iter_pdfium.assert_called_once()
+
+    def test_init_invalid_backend(self):
+        """测试不支持的解析库"""
+        with pytest.raises(ValueError):
+            PDFParser(backend="unknown")
+
     @patch('src.parser.pdf_parser.pdfplumber')
     @patch('src.parser.pdf_parser.PyPDF2')
     def test_extract_text_from_pdf_fallback_to_pypdf2(self, mock_pypdf2, mock_pdfplumber):
@@ -49,11 +93,14 @@ class TestPDFParser:
         mock_reader.pages = [mock_page]
         mock_pypdf2.PdfReader.return_value = mock_reader
         
-        with patch('builtins.open', mock_open()):
+        with patch('builtins.open', mock_open()) as mock_file, patch('src.parser.pdf_parser.mmap') as mock_mmap:
+            mock_file.return_value.fileno.return_value = 3
             result = self.parser.extract_text_from_pdf(self.test_pdf_path)
         
         assert result == "Test page content\n"
-        mock_pypdf2.PdfReader.assert_called_once()
+        # PyPDF2直接读取只读内存映射，而不是整文件读入的字节串
+        mock_mmap.mmap.assert_called_once_with(3, 0, access=mock_mmap.ACCESS_READ)
+        mock_pypdf2.PdfReader.assert_called_once_with(mock_mmap.mmap.return_value.__enter__.return_value)
     
     @patch('src.parser.pdf_parser.pdfplumber')
     def test_extract_text_from_pdf_failure(self, mock_pdfplumber):
@@ -78,7 +125,7 @@ class TestPDFParser:
         mock_reader.pages = [Mock(), Mock()]  # 2页
         mock_pypdf2.PdfReader.return_value = mock_reader
         
-        with patch('builtins.open', mock_open()):
+        with patch('builtins.open', mock_open()), patch('src.parser.pdf_parser.mmap'):
             result = self.parser.extract_metadata(self.test_pdf_path)
         
         expected = {
@@ -96,11 +143,26 @@ class TestPDFParser:
         """测试元数据提取失败"""
         mock_pypdf2.PdfReader.side_effect = Exception("Metadata error")
         
-        with patch('builtins.open', mock_open()):
+        with patch('builtins.open', mock_open()), patch('src.parser.pdf_parser.mmap'):
             result = self.parser.extract_metadata(self.test_pdf_path)
         
         assert result == {}
-    
+
+    def test_extract_metadata_from_real_file(self, tmp_path):
+        """测试通过内存映射读取真实PDF的元数据"""
+        import PyPDF2
+
+        pdf_path = tmp_path / "blank.pdf"
+        writer = PyPDF2.PdfWriter()
+        writer.add_blank_page(width=100, height=100)
+        writer.add_blank_page(width=100, height=100)
+        with open(pdf_path, 'wb') as f:
+            writer.write(f)
+
+        result = self.parser.extract_metadata(pdf_path)
+
+        assert result['pages'] == 2
+
     def test_identify_sections(self):
         """测试章节识别"""
         text = """
@@ -124,6 +186,28 @@ class TestPDFParser:
         assert sections[1].title == "INTRODUCTION"
         assert sections[2].title == "METHODOLOGY"
     
+    def test_identify_sections_line_indices(self):
+        """测试章节记录原始行号并兼容CRLF换行"""
+        text = "1. INTRODUCTION\r\n\r\nFirst line.\r\nSecond line.\r\n2. METHOD\r\nBody."
+
+        sections = self.parser.identify_sections(text)
+
+        assert [s.title for s in sections] == ["INTRODUCTION", "METHOD"]
+        assert sections[0].content == "First line.\nSecond line."
+        assert (sections[0].start_page, sections[0].end_page) == (0, 3)
+        assert (sections[1].start_page, sections[1].end_page) == (4, 5)
+
+    def test_identify_sections_offsets_only(self):
+        """测试只记录偏移时按需从全文获取章节内容"""
+        text = "1. INTRODUCTION\n  Intro line.\n\n2. METHOD\nMethod line.\n"
+
+        sections = self.parser.identify_sections(text, keep_content=False)
+
+        assert sections[0].content == ""
+        assert text[sections[0].start_offset:sections[0].end_offset].strip() == "Intro line."
+        assert sections[0].get_content(text) == "Intro line."
+        assert sections[1].get_content(text) == "Method line."
+
     def test_extract_abstract(self):
         """测试摘要提取"""
         text = """
@@ -172,6 +256,18 @@ class TestPDFParser:
         assert "Author A" in references[0]
         assert "Author B" in references[1]
     
+    def test_extract_references_many_entries(self):
+        """测试大量及跨行的参考文献条目"""
+        entries = "\n".join(f"[{i}] Author {i}. Title {i}." for i in range(1, 5001))
+        text = f"1. INTRODUCTION\nBody.\n\nREFERENCES\n{entries}\n[5001] Author X.\n  Continued title.\n"
+
+        references = self.parser.extract_references(text)
+
+        assert len(references) == 5001
+        assert references[0] == "Author 1. Title 1."
+        assert references[4999] == "Author 5000. Title 5000."
+        assert references[-1] == "Author X.\n  Continued title."
+
     def test_extract_references_not_found(self):
         """测试未找到参考文献"""
         text = """
@@ -217,6 +313,14 @@ class TestPDFParser:
         assert len(result.references) == 2
         assert result.full_text == "Full text content"
     
+    def test_guess_title(self):
+        """测试标题依次取自元数据、文件名和正文开头"""
+        text = "arXiv 2024\n1. Introduction to Things\nA Study of Fast Paper Parsing\nbody"
+
+        assert PDFParser._guess_title(Path("1234.5678_x.pdf"), "Meta Title", text) == "Meta Title"
+        assert PDFParser._guess_title(Path("1234.5678_Fast_Parsing.pdf"), "", text) == "Fast Parsing"
+        assert PDFParser._guess_title(Path("1234.5678_x.pdf"), "Paper_1", text) == "A Study of Fast Paper Parsing"
+    
     @patch.object(PDFParser, 'extract_text_from_pdf')
     def test_parse_paper_no_text(self, mock_extract_text):
         """测试解析论文时没有提取到文本"""
@@ -226,25 +330,32 @@ class TestPDFParser:
         
         assert result is None
     
-    @patch('json.dump')
-    @patch('builtins.open', new_callable=mock_open)
-    def test_save_parsed_paper(self, mock_file, mock_json_dump):
+    def test_save_parsed_paper(self, tmp_path):
         """测试保存解析结果"""
         parsed_paper = ParsedPaper(
             title="Test Paper",
             abstract="Test abstract",
             authors=["Author 1", "Author 2"],
-            sections=[],
+            sections=[PaperSection("INTRODUCTION", "Intro content", 1, 0, 1, 10, 23)],
             references=[],
             full_text="Test content",
             metadata={}
         )
         
-        output_path = Path("test_output.json")
+        output_path = tmp_path / "test_output.json"
         self.parser.save_parsed_paper(parsed_paper, output_path)
         
-        mock_file.assert_called_once_with(output_path, 'w', encoding='utf-8')
-        mock_json_dump.assert_called_once()
+        # 章节只保存偏移，内容不重复写入文件
+        assert output_path.stat().st_size < 1024
+        data = json.loads(output_path.read_text(encoding="utf-8"))
+        assert data["title"] == "Test Paper"
+        assert data["authors"] == ["Author 1", "Author 2"]
+        assert data["full_text"] == "Test content"
+        assert data["sections"] == [{
+            "title": "INTRODUCTION", "level": 1, "start_page": 0, "end_page": 1,
+            "start_offset": 10, "end_offset": 23
+        }]
+        assert "parsed_at" in data
     
     @patch.object(PDFParser, 'parse_paper')
     def test_batch_parse_papers(self, mock_parse_paper):
@@ -257,19 +368,170 @@ class TestPDFParser:
         pdf_dir = Path("test_pdfs")
         output_dir = Path("test_output")
         
-        with patch.object(Path, 'glob') as mock_glob:
-            mock_glob.return_value = [
-                Path("test1.pdf"),
-                Path("test2.pdf")
-            ]
-            
+        entries = [
+            Mock(path="test_pdfs/test1.pdf", is_file=Mock(return_value=True)),
+            Mock(path="test_pdfs/test2.pdf", is_file=Mock(return_value=True)),
+            Mock(path="test_pdfs/notes.txt", is_file=Mock(return_value=True)),
+            Mock(path="test_pdfs/old.pdf", is_file=Mock(return_value=False)),
+        ]
+        for entry in entries:
+            entry.name = Path(entry.path).name
+        
+        with patch('src.parser.pdf_parser.os.scandir', return_value=entries) as mock_scandir:
             with patch.object(Path, 'mkdir') as mock_mkdir:
-                result = self.parser.batch_parse_papers(pdf_dir, output_dir)
+                result = self.parser.batch_parse_papers(pdf_dir, output_dir, max_workers=1)
         
         assert len(result) == 2
         assert mock_parse_paper.call_count == 2
+        mock_scandir.assert_called_once_with(pdf_dir)
         mock_mkdir.assert_called_once_with(parents=True, exist_ok=True)
 
+    @patch.object(PDFParser, 'save_parsed_paper')
+    @patch.object(PDFParser, 'parse_paper')
+    def test_batch_parse_papers_in_memory(self, mock_parse_paper, mock_save, tmp_path):
+        """测试不指定输出目录时不读写解析文件"""
+        (tmp_path / "test1.pdf").write_bytes(b"%PDF-1.4")
+        mock_parse_paper.return_value = ParsedPaper("Paper", "", [], [], [], "text", {})
+
+        result = self.parser.batch_parse_papers(tmp_path, None, max_workers=1)
+
+        assert [paper.title for paper in result] == ["Paper"]
+        mock_save.assert_not_called()
+
+    @pytest.mark.skipif(fitz is None, reason="需要PyMuPDF生成测试PDF")
+    def test_batch_parse_papers_process_pool(self, tmp_path):
+        """测试多进程并行解析并保持文件顺序"""
+        pdf_dir = tmp_path / "pdfs"
+        output_dir = tmp_path / "output"
+        pdf_dir.mkdir()
+        for name in ("a", "b", "c"):
+            doc = fitz.open()
+            doc.new_page().insert_text((72, 72), f"Paper {name}")
+            doc.save(pdf_dir / f"{name}.pdf")
+            doc.close()
+
+        result = self.parser.batch_parse_papers(pdf_dir, output_dir, max_workers=2)
+
+        assert [paper.full_text.strip() for paper in result] == ["Paper a", "Paper b", "Paper c"]
+        assert len(list(output_dir.glob("*_parsed.json"))) == 3
+
+    @patch.object(PDFParser, 'parse_paper')
+    @patch('src.parser.pdf_parser.ProcessPoolExecutor', side_effect=OSError("no /dev/shm"))
+    def test_batch_parse_papers_pool_unavailable(self, mock_pool, mock_parse_paper, tmp_path):
+        """测试无法创建进程池时回退到当前进程内解析"""
+        for name in ("a", "b"):
+            (tmp_path / f"{name}.pdf").write_bytes(b"%PDF-1.4")
+        mock_parse_paper.return_value = ParsedPaper("Paper", "", [], [], [], "text", {})
+
+        result = self.parser.batch_parse_papers(tmp_path, tmp_path / "output", max_workers=2)
+
+        mock_pool.assert_called_once()
+        assert len(result) == 2
+        assert mock_parse_paper.call_count == 2
+        assert len(list((tmp_path / "output").glob("*_parsed.json"))) == 2
+
+    @patch.object(PDFParser, 'parse_paper')
+    def test_batch_parse_papers_worker_crash(self, mock_parse_paper, tmp_path):
+        """测试工作进程中途退出时保留已保存的结果，其余论文在当前进程内解析并保存"""
+        from concurrent.futures.process import BrokenProcessPool
+
+        class CrashingPool:
+            """第一篇论文正常完成后工作进程退出"""
+            def __init__(self, max_workers):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def map(self, fn, *iterables):
+                yield fn(*next(zip(*iterables)))
+                raise BrokenProcessPool("worker died")
+
+        for name in ("a", "b"):
+            (tmp_path / f"{name}.pdf").write_bytes(b"%PDF-1.4")
+        mock_parse_paper.return_value = ParsedPaper("Paper", "", [], [], [], "text", {})
+        output_dir = tmp_path / "output"
+
+        with patch('src.parser.pdf_parser.ProcessPoolExecutor', CrashingPool):
+            result = self.parser.batch_parse_papers(tmp_path, output_dir, max_workers=2)
+
+        assert len(result) == 2
+        # 第一篇由“工作进程”解析并保存，只有第二篇重新解析
+        assert [c.args[0].name for c in mock_parse_paper.call_args_list] == ["a.pdf", "b.pdf"]
+        assert sorted(p.name for p in output_dir.glob("*_parsed.json")) == ["a_parsed.json", "b_parsed.json"]
+
+    def test_save_and_load_parsed_paper(self, tmp_path):
+        """测试解析结果的保存和加载"""
+        parsed_paper = ParsedPaper(
+            title="Test Paper",
+            abstract="Test abstract",
+            authors=["Author 1"],
+            sections=[PaperSection("INTRODUCTION", "Intro content", 1, 0, 3)],
+            references=["Ref 1"],
+            full_text="Full text content",
+            metadata={"pages": 1}
+        )
+
+        output_path = tmp_path / "paper_parsed.json"
+        self.parser.save_parsed_paper(parsed_paper, output_path)
+        loaded = self.parser.load_parsed_paper(output_path)
+
+        assert loaded is not None
+        assert loaded.title == "Test Paper"
+        assert loaded.full_text == "Full text content"
+        assert loaded.sections[0].title == "INTRODUCTION"
+        assert loaded.sections[0].end_page == 3
+
+    @patch.object(PDFParser, 'parse_paper')
+    def test_batch_parse_papers_skips_up_to_date(self, mock_parse_paper, tmp_path):
+        """测试已有最新解析结果时跳过重新解析"""
+        pdf_dir = tmp_path / "pdfs"
+        output_dir = tmp_path / "output"
+        pdf_dir.mkdir()
+        output_dir.mkdir()
+        (pdf_dir / "test1.pdf").write_bytes(b"%PDF-1.4")
+
+        cached = ParsedPaper("Cached", "", [], [], [], "Cached text", {})
+        self.parser.save_parsed_paper(cached, output_dir / "test1_parsed.json")
+
+        result = self.parser.batch_parse_papers(pdf_dir, output_dir)
+
+        assert len(result) == 1
+        assert result[0].full_text == "Cached text"
+        mock_parse_paper.assert_not_called()
+
+        mock_parse_paper.return_value = cached
+        self.parser.batch_parse_papers(pdf_dir, output_dir, force=True)
+        mock_parse_paper.assert_called_once()
+
+    @patch.object(PDFParser, 'parse_paper')
+    def test_batch_parse_papers_skips_cached(self, mock_parse_paper, tmp_path):
+        """测试按索引中的修改时间和大小跳过未变化的PDF"""
+        pdf_dir = tmp_path / "pdfs"
+        output_dir = tmp_path / "output"
+        pdf_dir.mkdir()
+        for name in ("a", "b"):
+            (pdf_dir / f"{name}.pdf").write_bytes(b"%PDF-1.4")
+        mock_parse_paper.return_value = ParsedPaper("Paper", "", [], [], [], "text", {})
+
+        self.parser.batch_parse_papers(pdf_dir, output_dir, max_workers=1)
+        assert mock_parse_paper.call_count == 2
+
+        mock_parse_paper.reset_mock()
+        result = self.parser.batch_parse_papers(pdf_dir, output_dir, max_workers=1)
+        assert mock_parse_paper.call_count == 0
+        assert len(result) == 2
+
+        # PDF被替换为修改时间更早的文件，解析结果虽然更新，仍需重新解析
+        replaced = pdf_dir / "a.pdf"
+        replaced.write_bytes(b"%PDF-1.4 replaced")
+        os.utime(replaced, (0, 0))
+        self.parser.batch_parse_papers(pdf_dir, output_dir, max_workers=1)
+        mock_parse_paper.assert_called_once_with(replaced)
+
 
 class TestPaperSection:
     """论文章节测试类"""
@@ -310,4 +572,12 @@ class TestParsedPaper:
         assert paper.abstract == "Test abstract"
         assert len(paper.authors) == 2
         assert paper.full_text == "Test content"
-        assert paper.metadata["key"] == "value" 
\ No newline at end of file
+        assert paper.metadata["key"] == "value"
+    
+    def test_slots_present(self):
+        """测试解析结果对象不带实例字典"""
+        section = PaperSection("INTRODUCTION", "Intro", 1, 0, 0)
+        paper = ParsedPaper("Paper", "", [], [section], [], "text", {})
+        
+        assert not hasattr(section, '__dict__')
+        assert not hasattr(paper, '__dict__') 
\ No newline at end of file